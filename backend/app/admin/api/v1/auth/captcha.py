@@ -1,9 +1,8 @@
-from fast_captcha import img_captcha
 from fastapi import APIRouter, Depends, Request
 from fastapi_limiter.depends import RateLimiter
-from starlette.concurrency import run_in_threadpool
 
 from backend.app.admin.conf import admin_settings
+from backend.app.admin.service.captcha_service import captcha_pool
 from backend.common.response.response_schema import ResponseModel, response_base
 from backend.database.db_redis import redis_client
 
@@ -20,7 +19,7 @@ async def get_captcha(request: Request) -> ResponseModel:
     Get captcha
     """
     img_type: str = "base64"
-    img, code = await run_in_threadpool(img_captcha, img_byte=img_type)
+    img, code = await captcha_pool.get()
     ip = request.state.ip
     await redis_client.set(
         f"{admin_settings.CAPTCHA_LOGIN_REDIS_PREFIX}:{ip}",
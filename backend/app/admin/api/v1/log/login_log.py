@@ -0,0 +1,146 @@
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from backend.app.admin.schema.login_log import GetLoginLogListDetails
+from backend.app.admin.service.login_log_service import login_log_service
+from backend.common.enums import ExportFormat, MatchType, PageCountType
+from backend.common.export import export_data
+from backend.common.pagination import (
+    CursorPagination,
+    DependsPagination,
+    cursor_paging_data,
+    paging_data,
+)
+from backend.common.response.response_schema import ResponseModel, response_base
+from backend.common.security.jwt import DependsJwtAuth
+from backend.common.security.permission import RequestPermission
+from backend.common.security.rbac import DependsRBAC
+from backend.database.db_mysql import CurrentSession
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    summary="Get login logs",
+    dependencies=[
+        DependsJwtAuth,
+        DependsPagination,
+    ],
+)
+async def get_pagination_login_logs(
+    db: CurrentSession,
+    username: Annotated[str | None, Query()] = None,
+    status: Annotated[int | None, Query()] = None,
+    ip: Annotated[str | None, Query()] = None,
+    start_time: Annotated[datetime | None, Query()] = None,
+    end_time: Annotated[datetime | None, Query()] = None,
+    match_type: Annotated[MatchType, Query()] = MatchType.prefix,
+) -> ResponseModel:
+    log_select = await login_log_service.get_select(
+        username=username,
+        status=status,
+        ip=ip,
+        start_time=start_time,
+        end_time=end_time,
+        match_type=match_type,
+    )
+    page_data = await paging_data(
+        db, log_select, GetLoginLogListDetails, PageCountType.estimate
+    )
+    return response_base.success(data=page_data)
+
+
+@router.get(
+    "/cursor",
+    summary="Get login logs by cursor",
+    dependencies=[DependsJwtAuth],
+)
+async def get_cursor_login_logs(
+    db: CurrentSession,
+    params: CursorPagination,
+    username: Annotated[str | None, Query()] = None,
+    status: Annotated[int | None, Query()] = None,
+    ip: Annotated[str | None, Query()] = None,
+    start_time: Annotated[datetime | None, Query()] = None,
+    end_time: Annotated[datetime | None, Query()] = None,
+    match_type: Annotated[MatchType, Query()] = MatchType.prefix,
+) -> ResponseModel:
+    log_select = await login_log_service.get_select(
+        username=username,
+        status=status,
+        ip=ip,
+        start_time=start_time,
+        end_time=end_time,
+        match_type=match_type,
+    )
+    page_data = await cursor_paging_data(db, log_select, GetLoginLogListDetails, params)
+    return response_base.success(data=page_data)
+
+
+@router.get(
+    "/export",
+    summary="Export login logs",
+    dependencies=[
+        Depends(RequestPermission("log:login:export")),
+        DependsRBAC,
+    ],
+)
+async def export_login_logs(
+    username: Annotated[str | None, Query()] = None,
+    status: Annotated[int | None, Query()] = None,
+    ip: Annotated[str | None, Query()] = None,
+    start_time: Annotated[datetime | None, Query()] = None,
+    end_time: Annotated[datetime | None, Query()] = None,
+    match_type: Annotated[MatchType, Query()] = MatchType.prefix,
+    export_format: Annotated[ExportFormat, Query()] = ExportFormat.csv,
+    compress: Annotated[bool, Query()] = False,
+) -> StreamingResponse:
+    log_select = await login_log_service.get_select(
+        username=username,
+        status=status,
+        ip=ip,
+        start_time=start_time,
+        end_time=end_time,
+        match_type=match_type,
+    )
+    return export_data(
+        log_select,
+        GetLoginLogListDetails,
+        export_format,
+        "login_logs",
+        compress=compress,
+    )
+
+
+@router.delete(
+    "",
+    summary="Delete login log",
+    dependencies=[
+        Depends(RequestPermission("log:login:del")),
+        DependsRBAC,
+    ],
+)
+async def delete_login_log(pk: Annotated[list[int], Query(...)]) -> ResponseModel:
+    count = await login_log_service.delete(pk=pk)
+    if count > 0:
+        return response_base.success()
+    return response_base.fail()
+
+
+@router.delete(
+    "/all",
+    summary="Delete all login logs",
+    dependencies=[
+        Depends(RequestPermission("log:login:empty")),
+        DependsRBAC,
+    ],
+)
+async def delete_all_login_logs() -> ResponseModel:
+    count = await login_log_service.delete_all()
+    if count > 0:
+        return response_base.success()
+    return response_base.fail()
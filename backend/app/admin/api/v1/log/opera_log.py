@@ -0,0 +1,226 @@
+from datetime import date, datetime
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from backend.app.admin.schema.opera_log import GetOperaLogListDetails
+from backend.app.admin.service.opera_log_rollup_service import (
+    opera_log_rollup_service,
+)
+from backend.app.admin.service.opera_log_service import opera_log_service
+from backend.common.enums import (
+    ExportFormat,
+    MatchType,
+    PageCountType,
+    RollupGranularity,
+)
+from backend.common.export import export_data
+from backend.common.pagination import (
+    CursorPagination,
+    DependsPagination,
+    cursor_paging_data,
+    paging_data,
+)
+from backend.common.response.response_schema import ResponseModel, response_base
+from backend.common.security.jwt import DependsJwtAuth
+from backend.common.security.permission import RequestPermission
+from backend.common.security.rbac import DependsRBAC
+from backend.database.db_mysql import CurrentSession
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    summary="Get operation logs",
+    dependencies=[
+        DependsJwtAuth,
+        DependsPagination,
+    ],
+)
+async def get_pagination_opera_logs(
+    db: CurrentSession,
+    username: Annotated[str | None, Query()] = None,
+    status: Annotated[int | None, Query()] = None,
+    ip: Annotated[str | None, Query()] = None,
+    start_time: Annotated[datetime | None, Query()] = None,
+    end_time: Annotated[datetime | None, Query()] = None,
+    path: Annotated[str | None, Query()] = None,
+    method: Annotated[str | None, Query()] = None,
+    trace_id: Annotated[str | None, Query()] = None,
+    match_type: Annotated[MatchType, Query()] = MatchType.prefix,
+) -> ResponseModel:
+    log_select = await opera_log_service.get_select(
+        username=username,
+        status=status,
+        ip=ip,
+        start_time=start_time,
+        end_time=end_time,
+        path=path,
+        method=method,
+        trace_id=trace_id,
+        match_type=match_type,
+    )
+    page_data = await paging_data(
+        db, log_select, GetOperaLogListDetails, PageCountType.estimate
+    )
+    return response_base.success(data=page_data)
+
+
+@router.get(
+    "/cursor",
+    summary="Get operation logs by cursor",
+    dependencies=[DependsJwtAuth],
+)
+async def get_cursor_opera_logs(
+    db: CurrentSession,
+    params: CursorPagination,
+    username: Annotated[str | None, Query()] = None,
+    status: Annotated[int | None, Query()] = None,
+    ip: Annotated[str | None, Query()] = None,
+    start_time: Annotated[datetime | None, Query()] = None,
+    end_time: Annotated[datetime | None, Query()] = None,
+    path: Annotated[str | None, Query()] = None,
+    method: Annotated[str | None, Query()] = None,
+    trace_id: Annotated[str | None, Query()] = None,
+    match_type: Annotated[MatchType, Query()] = MatchType.prefix,
+) -> ResponseModel:
+    log_select = await opera_log_service.get_select(
+        username=username,
+        status=status,
+        ip=ip,
+        start_time=start_time,
+        end_time=end_time,
+        path=path,
+        method=method,
+        trace_id=trace_id,
+        match_type=match_type,
+    )
+    page_data = await cursor_paging_data(db, log_select, GetOperaLogListDetails, params)
+    return response_base.success(data=page_data)
+
+
+@router.get(
+    "/archive",
+    summary="Get archived operation logs",
+    description="Stream archived logs between start_date and end_date as NDJSON",
+    dependencies=[DependsJwtAuth],
+)
+async def get_archived_opera_logs(
+    start_date: Annotated[date, Query()],
+    end_date: Annotated[date, Query()],
+    username: Annotated[str | None, Query()] = None,
+    status: Annotated[int | None, Query()] = None,
+    ip: Annotated[str | None, Query()] = None,
+) -> StreamingResponse:
+    lines = opera_log_service.get_archive(
+        start_date=start_date,
+        end_date=end_date,
+        username=username,
+        status=status,
+        ip=ip,
+    )
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.get(
+    "/export",
+    summary="Export operation logs",
+    dependencies=[
+        Depends(RequestPermission("log:opera:export")),
+        DependsRBAC,
+    ],
+)
+async def export_opera_logs(
+    username: Annotated[str | None, Query()] = None,
+    status: Annotated[int | None, Query()] = None,
+    ip: Annotated[str | None, Query()] = None,
+    start_time: Annotated[datetime | None, Query()] = None,
+    end_time: Annotated[datetime | None, Query()] = None,
+    path: Annotated[str | None, Query()] = None,
+    method: Annotated[str | None, Query()] = None,
+    trace_id: Annotated[str | None, Query()] = None,
+    match_type: Annotated[MatchType, Query()] = MatchType.prefix,
+    export_format: Annotated[ExportFormat, Query()] = ExportFormat.csv,
+    compress: Annotated[bool, Query()] = False,
+) -> StreamingResponse:
+    log_select = await opera_log_service.get_select(
+        username=username,
+        status=status,
+        ip=ip,
+        start_time=start_time,
+        end_time=end_time,
+        path=path,
+        method=method,
+        trace_id=trace_id,
+        match_type=match_type,
+    )
+    return export_data(
+        log_select,
+        GetOperaLogListDetails,
+        export_format,
+        "opera_logs",
+        compress=compress,
+    )
+
+
+@router.get(
+    "/analytics",
+    summary="Get operation log analytics",
+    description="Request counts, error rates and cost percentiles from the rollups",
+    dependencies=[DependsJwtAuth],
+)
+async def get_opera_log_analytics(
+    start_time: Annotated[datetime, Query()],
+    end_time: Annotated[datetime, Query()],
+    granularity: Annotated[RollupGranularity, Query()] = RollupGranularity.hour,
+    group_by: Annotated[
+        Literal["path", "username", "method", "code", "bucket_time"], Query()
+    ] = "path",
+    path: Annotated[str | None, Query()] = None,
+    method: Annotated[str | None, Query()] = None,
+    username: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(gt=0, le=1000)] = 100,
+) -> ResponseModel:
+    data = await opera_log_rollup_service.get_analytics(
+        granularity=granularity,
+        start_time=start_time,
+        end_time=end_time,
+        group_by=group_by,
+        path=path,
+        method=method,
+        username=username,
+        limit=limit,
+    )
+    return response_base.success(data=data)
+
+
+@router.delete(
+    "",
+    summary="Delete operation log",
+    dependencies=[
+        Depends(RequestPermission("log:opera:del")),
+        DependsRBAC,
+    ],
+)
+async def delete_opera_log(pk: Annotated[list[int], Query(...)]) -> ResponseModel:
+    count = await opera_log_service.delete(pk=pk)
+    if count > 0:
+        return response_base.success()
+    return response_base.fail()
+
+
+@router.delete(
+    "/all",
+    summary="Delete all operation logs",
+    dependencies=[
+        Depends(RequestPermission("log:opera:empty")),
+        DependsRBAC,
+    ],
+)
+async def delete_all_opera_logs() -> ResponseModel:
+    count = await opera_log_service.delete_all()
+    if count > 0:
+        return response_base.success()
+    return response_base.fail()
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from backend.app.admin.api.v1.monitor.metrics import router as metrics_router
 from backend.app.admin.api.v1.monitor.redis import router as redis_router
 from backend.app.admin.api.v1.monitor.server import router as server_router
 
@@ -7,3 +8,4 @@ router = APIRouter(prefix="/monitors")
 
 router.include_router(redis_router, prefix="/redis", tags=["Redis monitor"])
 router.include_router(server_router, prefix="/server", tags=["Server monitor"])
+router.include_router(metrics_router, prefix="/metrics", tags=["Metrics monitor"])
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+
+from backend.common.response.response_schema import ResponseModel, response_base
+from backend.common.security.jwt import DependsJwtAuth
+from backend.common.security.permission import RequestPermission
+from backend.utils.metrics import metrics
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    summary="Get process metrics",
+    dependencies=[
+        Depends(RequestPermission("sys:monitor:metrics")),
+        DependsJwtAuth,
+    ],
+)
+async def get_metrics() -> ResponseModel:
+    return response_base.success(data=metrics.snapshot())
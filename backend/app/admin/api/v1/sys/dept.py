@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Depends, Path, Query, Request, Response
 
 from backend.app.admin.schema.dept import (
     CreateDeptParam,
@@ -13,6 +13,7 @@ from backend.common.security.jwt import DependsJwtAuth
 from backend.common.security.permission import RequestPermission
 from backend.common.security.rbac import DependsRBAC
 from backend.utils.serializers import select_as_dict
+from backend.utils.tree_cache import serialized_response
 
 router = APIRouter()
 
@@ -28,15 +29,16 @@ async def get_dept(pk: Annotated[int, Path(...)]) -> ResponseModel:
     "", summary="Get all department display trees", dependencies=[DependsJwtAuth]
 )
 async def get_all_depts_tree(
+    request: Request,
     name: Annotated[str | None, Query()] = None,
     leader: Annotated[str | None, Query()] = None,
     phone: Annotated[str | None, Query()] = None,
     status: Annotated[int | None, Query()] = None,
-) -> ResponseModel:
+) -> Response:
     dept = await dept_service.get_dept_tree(
         name=name, leader=leader, phone=phone, status=status
     )
-    return response_base.success(data=dept)
+    return serialized_response(request, dept)
 
 
 @router.post(
@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Path, Query, Request
+from fastapi import APIRouter, Depends, Path, Query, Request, Response
 
 from backend.app.admin.schema.menu import (
     CreateMenuParam,
@@ -13,6 +13,7 @@ from backend.common.security.jwt import DependsJwtAuth
 from backend.common.security.permission import RequestPermission
 from backend.common.security.rbac import DependsRBAC
 from backend.utils.serializers import select_as_dict
+from backend.utils.tree_cache import serialized_response
 
 router = APIRouter()
 
@@ -20,9 +21,9 @@ router = APIRouter()
 @router.get(
     "/sidebar", summary="Get user menu display tree", dependencies=[DependsJwtAuth]
 )
-async def get_user_sidebar_tree(request: Request) -> ResponseModel:
+async def get_user_sidebar_tree(request: Request) -> Response:
     menu = await menu_service.get_user_menu_tree(request=request)
-    return response_base.success(data=menu)
+    return serialized_response(request, menu)
 
 
 @router.get("/{pk}", summary="Get menu details", dependencies=[DependsJwtAuth])
@@ -34,11 +35,12 @@ async def get_menu(pk: Annotated[int, Path(...)]) -> ResponseModel:
 
 @router.get("", summary="Get all menu display trees", dependencies=[DependsJwtAuth])
 async def get_all_menus(
+    request: Request,
     title: Annotated[str | None, Query()] = None,
     status: Annotated[int | None, Query()] = None,
-) -> ResponseModel:
+) -> Response:
     menu = await menu_service.get_menu_tree(title=title, status=status)
-    return response_base.success(data=menu)
+    return serialized_response(request, menu)
 
 
 @router.post(
@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Path, Query, Request
+from fastapi import APIRouter, Depends, Path, Query, Request, Response
 
 from backend.app.admin.schema.role import (
     CreateRoleParam,
@@ -17,6 +17,7 @@ from backend.common.security.permission import RequestPermission
 from backend.common.security.rbac import DependsRBAC
 from backend.database.db_mysql import CurrentSession
 from backend.utils.serializers import select_as_dict, select_list_serialize
+from backend.utils.tree_cache import serialized_response
 
 router = APIRouter()
 
@@ -40,9 +41,11 @@ async def get_user_all_roles(pk: Annotated[int, Path(...)]) -> ResponseModel:
     summary="Get all menus of the character",
     dependencies=[DependsJwtAuth],
 )
-async def get_role_all_menus(pk: Annotated[int, Path(...)]) -> ResponseModel:
+async def get_role_all_menus(
+    request: Request, pk: Annotated[int, Path(...)]
+) -> Response:
     menu = await menu_service.get_role_menu_tree(pk=pk)
-    return response_base.success(data=menu)
+    return serialized_response(request, menu)
 
 
 @router.get("/{pk}", summary="Get role details", dependencies=[DependsJwtAuth])
@@ -1,18 +1,22 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Path, Query, Request
+from fastapi.responses import StreamingResponse
 
 from backend.app.admin.schema.user import (
     AddUserParam,
     AvatarParam,
     GetCurrentUserInfoDetail,
     GetUserInfoListDetails,
+    GetUserInfoNoRelationDetail,
     RegisterUserParam,
     ResetPasswordParam,
     UpdateUserParam,
     UpdateUserRoleParam,
 )
 from backend.app.admin.service.user_service import user_service
+from backend.common.enums import ExportFormat
+from backend.common.export import export_data
 from backend.common.pagination import DependsPagination, paging_data
 from backend.common.response.response_schema import ResponseModel, response_base
 from backend.common.security.jwt import DependsJwtAuth
@@ -57,6 +61,40 @@ async def get_current_user(request: Request) -> ResponseModel:
     return response_base.success(data=data)
 
 
+@router.get(
+    "/export",
+    summary="Export users",
+    dependencies=[
+        Depends(RequestPermission("sys:user:export")),
+        DependsRBAC,
+    ],
+)
+async def export_users(
+    dept: Annotated[int | None, Query()] = None,
+    username: Annotated[str | None, Query()] = None,
+    phone: Annotated[str | None, Query()] = None,
+    status: Annotated[int | None, Query()] = None,
+    include_sub_dept: Annotated[bool, Query()] = False,
+    export_format: Annotated[ExportFormat, Query()] = ExportFormat.csv,
+    compress: Annotated[bool, Query()] = False,
+) -> StreamingResponse:
+    user_select = await user_service.get_select(
+        dept=dept,
+        username=username,
+        phone=phone,
+        status=status,
+        include_sub_dept=include_sub_dept,
+        with_relations=False,
+    )
+    return export_data(
+        user_select,
+        GetUserInfoNoRelationDetail,
+        export_format,
+        "users",
+        compress=compress,
+    )
+
+
 @router.get(
     "/{username}", summary="View user information", dependencies=[DependsJwtAuth]
 )
@@ -121,9 +159,14 @@ async def get_pagination_users(
     username: Annotated[str | None, Query()] = None,
     phone: Annotated[str | None, Query()] = None,
     status: Annotated[int | None, Query()] = None,
+    include_sub_dept: Annotated[bool, Query()] = False,
 ):
     user_select = await user_service.get_select(
-        dept=dept, username=username, phone=phone, status=status
+        dept=dept,
+        username=username,
+        phone=phone,
+        status=status,
+        include_sub_dept=include_sub_dept,
     )
     page_data = await paging_data(db, user_select, GetUserInfoListDetails)
     return response_base.success(data=page_data)
@@ -32,6 +32,7 @@ class AdminSettings(BaseSettings):
     # Captcha
     CAPTCHA_LOGIN_REDIS_PREFIX: str = "fba:login:captcha"
     CAPTCHA_LOGIN_EXPIRE_SECONDS: int = 60 * 5
+    CAPTCHA_POOL_SIZE: int = 100
 
     # Config
     CONFIG_REDIS_KEY: str = "fba:config"
@@ -1,6 +1,6 @@
 from typing import Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Row, String, func, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy_crud_plus import CRUDPlus
@@ -38,9 +38,9 @@ class CRUDDept(CRUDPlus[Dept]):
         leader: str = None,
         phone: str = None,
         status: int = None,
-    ) -> Sequence[Dept]:
+    ) -> Sequence[Row]:
         """
-        Get all depts
+        Get all depts, as column rows for building the tree
 
         :param db:
         :param name:
@@ -58,17 +58,25 @@ class CRUDDept(CRUDPlus[Dept]):
             filters.update(phone__startswith=phone)
         if status is not None:
             filters.update(status=status)
-        return await self.select_models_order(db, sort_columns="sort", **filters)
+        stmt = await self.select_order(sort_columns="sort", **filters)
+        dept = await db.execute(stmt.with_only_columns(*self.model.__table__.columns))
+        return dept.all()
 
-    async def create(self, db: AsyncSession, obj_in: CreateDeptParam) -> None:
+    async def create(
+        self, db: AsyncSession, obj_in: CreateDeptParam, parent: Dept | None = None
+    ) -> None:
         """
         Create dept
 
         :param db:
         :param obj_in:
+        :param parent: parent dept, its path prefixes the path of the new dept
         :return:
         """
-        await self.create_model(db, obj_in)
+        dept = self.model(**obj_in.model_dump())
+        db.add(dept)
+        await db.flush()
+        dept.path = f"{parent.path if parent else '/'}{dept.id}/"
 
     async def update(
         self, db: AsyncSession, dept_id: int, obj_in: UpdateDeptParam
@@ -83,6 +91,62 @@ class CRUDDept(CRUDPlus[Dept]):
         """
         return await self.update_model(db, dept_id, obj_in)
 
+    async def update_path(self, db: AsyncSession, old_path: str, new_path: str) -> int:
+        """
+        Replace the path prefix of a dept and all its sub-depts
+
+        :param db:
+        :param old_path:
+        :param new_path:
+        :return:
+        """
+        stmt = (
+            update(self.model)
+            .where(self.model.path.startswith(old_path))
+            .values(
+                path=literal(new_path, String)
+                + func.substr(self.model.path, len(old_path) + 1)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        return result.rowcount
+
+    async def get_descendants(self, db: AsyncSession, dept: Dept) -> Sequence[Dept]:
+        """
+        Get all sub-depts, a range scan on the path index
+
+        :param db:
+        :param dept:
+        :return:
+        """
+        stmt = select(self.model).where(
+            self.model.path.startswith(dept.path),
+            self.model.id != dept.id,
+            self.model.del_flag == 0,
+        )
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    async def get_ancestors(self, db: AsyncSession, dept: Dept) -> Sequence[Dept]:
+        """
+        Get all parent depts from the root down, by the ids in the path
+
+        :param db:
+        :param dept:
+        :return:
+        """
+        ancestor_ids = [int(pk) for pk in dept.path.strip("/").split("/")[:-1]]
+        if not ancestor_ids:
+            return []
+        stmt = (
+            select(self.model)
+            .where(self.model.id.in_(ancestor_ids))
+            .order_by(func.length(self.model.path))
+        )
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
     async def delete(self, db: AsyncSession, dept_id: int) -> int:
         """
         Delete dept
@@ -1,9 +1,13 @@
-from sqlalchemy import Select
+from datetime import datetime
+
+from sqlalchemy import Select, delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy_crud_plus import CRUDPlus
 
 from backend.app.admin.model import LoginLog
 from backend.app.admin.schema.login_log import CreateLoginLogParam
+from backend.common.enums import MatchType
+from backend.utils.log_search import match_filter
 
 
 class CRUDLoginLog(CRUDPlus[LoginLog]):
@@ -13,6 +17,9 @@ class CRUDLoginLog(CRUDPlus[LoginLog]):
         username: str | None = None,
         status: int | None = None,
         ip: str | None = None,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+        match_type: MatchType = MatchType.prefix,
     ) -> Select:
         """
         Get login log list
@@ -20,15 +27,22 @@ class CRUDLoginLog(CRUDPlus[LoginLog]):
         :param username:
         :param status:
         :param ip:
+        :param start_time: created at or after, prunes partitions
+        :param end_time: created before, prunes partitions
+        :param match_type: match mode of username and ip
         :return:
         """
         filters = {}
         if username is not None:
-            filters.update(username__like=f"%{username}%")
+            filters.update(match_filter("username", username, match_type))
         if status is not None:
             filters.update(status=status)
         if ip is not None:
-            filters.update(ip__like=f"%{ip}%")
+            filters.update(match_filter("ip", ip, match_type))
+        if start_time is not None:
+            filters.update(created_time__ge=start_time)
+        if end_time is not None:
+            filters.update(created_time__lt=end_time)
         return await self.select_order("created_time", "desc", **filters)
 
     async def create(self, db: AsyncSession, obj_in: CreateLoginLogParam) -> None:
@@ -60,5 +74,64 @@ class CRUDLoginLog(CRUDPlus[LoginLog]):
         """
         return await self.delete_model_by_column(db, allow_multiple=True)
 
+    async def get_batch_max_id(
+        self, db: AsyncSession, last_id: int, batch_size: int
+    ) -> int | None:
+        """
+        Get the largest id of the next batch of login logs after last_id
+
+        :param db:
+        :param last_id:
+        :param batch_size:
+        :return:
+        """
+        batch = (
+            select(self.model.id)
+            .where(self.model.id > last_id)
+            .order_by(self.model.id)
+            .limit(batch_size)
+            .subquery()
+        )
+        return await db.scalar(select(func.max(batch.c.id)))
+
+    async def count_expired(
+        self, db: AsyncSession, start_id: int, end_id: int, before: datetime
+    ) -> int:
+        """
+        Count login logs with start_id < id <= end_id created before the given time
+
+        :param db:
+        :param start_id:
+        :param end_id:
+        :param before:
+        :return:
+        """
+        stmt = select(func.count()).where(
+            self.model.id > start_id,
+            self.model.id <= end_id,
+            self.model.created_time < before,
+        )
+        return await db.scalar(stmt)
+
+    async def delete_expired(
+        self, db: AsyncSession, start_id: int, end_id: int, before: datetime
+    ) -> int:
+        """
+        Delete login logs with start_id < id <= end_id created before the given time
+
+        :param db:
+        :param start_id:
+        :param end_id:
+        :param before:
+        :return:
+        """
+        stmt = delete(self.model).where(
+            self.model.id > start_id,
+            self.model.id <= end_id,
+            self.model.created_time < before,
+        )
+        result = await db.execute(stmt)
+        return result.rowcount
+
 
 login_log_dao: CRUDLoginLog = CRUDLoginLog(LoginLog)
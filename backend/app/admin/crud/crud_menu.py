@@ -1,11 +1,13 @@
 from typing import Sequence
 
-from sqlalchemy import and_, asc, select
+from sqlalchemy import Row, and_, asc, select
 from sqlalchemy.orm import selectinload
 from sqlalchemy_crud_plus import CRUDPlus
 
 from backend.app.admin.model import Menu
+from backend.app.admin.model.sys_role_menu import sys_role_menu
 from backend.app.admin.schema.menu import CreateMenuParam, UpdateMenuParam
+from backend.common.enums import StatusType
 
 
 class CRUDMenu(CRUDPlus[Menu]):
@@ -32,9 +34,9 @@ class CRUDMenu(CRUDPlus[Menu]):
 
     async def get_all(
         self, db, title: str | None = None, status: int | None = None
-    ) -> Sequence[Menu]:
+    ) -> Sequence[Row]:
         """
-        Get all menus
+        Get all menus, as column rows for building the tree
 
         :param db:
         :param title:
@@ -46,26 +48,65 @@ class CRUDMenu(CRUDPlus[Menu]):
             filters.update(title=f"%{title}%")
         if status is not None:
             filters.update(status=status)
-        return await self.select_models_order(db, "sort", **filters)
+        stmt = await self.select_order("sort", **filters)
+        menu = await db.execute(stmt.with_only_columns(*self.model.__table__.columns))
+        return menu.all()
 
     async def get_role_menus(
         self, db, superuser: bool, menu_ids: list[int]
-    ) -> Sequence[Menu]:
+    ) -> Sequence[Row]:
         """
-        Get role menus
+        Get role menus, as column rows for building the tree
 
         :param db:
         :param superuser:
         :param menu_ids:
         :return:
         """
-        stmt = select(self.model).order_by(asc(self.model.sort))
+        stmt = select(*self.model.__table__.columns).order_by(asc(self.model.sort))
         where_list = [self.model.menu_type.in_([0, 1])]
         if not superuser:
             where_list.append(self.model.id.in_(menu_ids))
         stmt = stmt.where(and_(*where_list))
         menu = await db.execute(stmt)
-        return menu.scalars().all()
+        return menu.all()
+
+    async def get_role_menu_ids(self, db, role_ids: list[int]) -> Sequence[int]:
+        """
+        Get menu ids by role ids
+
+        :param db:
+        :param role_ids:
+        :return:
+        """
+        stmt = (
+            select(sys_role_menu.c.menu_id)
+            .where(sys_role_menu.c.role_id.in_(role_ids))
+            .distinct()
+        )
+        menu_ids = await db.execute(stmt)
+        return menu_ids.scalars().all()
+
+    async def get_role_perms(self, db, role_ids: list[int]) -> Sequence[str]:
+        """
+        Get permission marks of enabled menus by role ids
+
+        :param db:
+        :param role_ids:
+        :return:
+        """
+        stmt = (
+            select(self.model.perms)
+            .join(sys_role_menu, sys_role_menu.c.menu_id == self.model.id)
+            .where(
+                sys_role_menu.c.role_id.in_(role_ids),
+                self.model.status == StatusType.enable,
+                self.model.perms.is_not(None),
+            )
+            .distinct()
+        )
+        perms = await db.execute(stmt)
+        return perms.scalars().all()
 
     async def create(self, db, obj_in: CreateMenuParam) -> None:
         """
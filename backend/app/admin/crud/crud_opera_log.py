@@ -1,9 +1,15 @@
-from sqlalchemy import Select
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import Row, Select, delete, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy_crud_plus import CRUDPlus
 
 from backend.app.admin.model import OperaLog
 from backend.app.admin.schema.opera_log import CreateOperaLogParam
+from backend.common.enums import MatchType
+from backend.utils.log_search import match_filter
+from backend.utils.timezone import timezone
 
 
 class CRUDOperaLogDao(CRUDPlus[OperaLog]):
@@ -13,6 +19,12 @@ class CRUDOperaLogDao(CRUDPlus[OperaLog]):
         username: str | None = None,
         status: int | None = None,
         ip: str | None = None,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+        path: str | None = None,
+        method: str | None = None,
+        trace_id: str | None = None,
+        match_type: MatchType = MatchType.prefix,
     ) -> Select:
         """
         Get operation log list
@@ -20,15 +32,31 @@ class CRUDOperaLogDao(CRUDPlus[OperaLog]):
         :param username:
         :param status:
         :param ip:
+        :param start_time: created at or after, prunes partitions
+        :param end_time: created before, prunes partitions
+        :param path:
+        :param method:
+        :param trace_id:
+        :param match_type: match mode of username, ip and path
         :return:
         """
         filters = {}
         if username is not None:
-            filters.update(username=f"%{username}%")
+            filters.update(match_filter("username", username, match_type))
         if status is not None:
             filters.update(status=status)
         if ip is not None:
-            filters.update(ip=f"%{ip}%")
+            filters.update(match_filter("ip", ip, match_type))
+        if path is not None:
+            filters.update(match_filter("path", path, match_type))
+        if method is not None:
+            filters.update(method=method.upper())
+        if trace_id is not None:
+            filters.update(trace_id=trace_id)
+        if start_time is not None:
+            filters.update(created_time__ge=start_time)
+        if end_time is not None:
+            filters.update(created_time__lt=end_time)
         return await self.select_order("created_time", "desc", **filters)
 
     async def create(self, db: AsyncSession, obj_in: CreateOperaLogParam) -> None:
@@ -41,6 +69,22 @@ class CRUDOperaLogDao(CRUDPlus[OperaLog]):
         """
         await self.create_model(db, obj_in)
 
+    async def bulk_create(
+        self, db: AsyncSession, obj_ins: list[CreateOperaLogParam]
+    ) -> None:
+        """
+        Create operation logs with one multi-row INSERT
+
+        :param db:
+        :param obj_ins:
+        :return:
+        """
+        created_time = timezone.now()
+        await db.execute(
+            insert(self.model),
+            [{**obj.model_dump(), "created_time": created_time} for obj in obj_ins],
+        )
+
     async def delete(self, db: AsyncSession, pk: list[int]) -> int:
         """
         Delete operation log
@@ -60,5 +104,93 @@ class CRUDOperaLogDao(CRUDPlus[OperaLog]):
         """
         return await self.delete_model_by_column(db, allow_multiple=True)
 
+    async def get_rollup_batch(
+        self, db: AsyncSession, last_id: int, limit: int
+    ) -> Sequence[Row]:
+        """
+        Get the next operation logs after last_id in id order
+
+        :param db:
+        :param last_id:
+        :param limit:
+        :return:
+        """
+        stmt = (
+            select(
+                self.model.id,
+                self.model.created_time,
+                self.model.path,
+                self.model.method,
+                self.model.status,
+                self.model.code,
+                self.model.username,
+                self.model.cost_time,
+            )
+            .where(self.model.id > last_id)
+            .order_by(self.model.id)
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return result.all()
+
+    async def get_batch_max_id(
+        self, db: AsyncSession, last_id: int, batch_size: int
+    ) -> int | None:
+        """
+        Get the largest id of the next batch of operation logs after last_id
+
+        :param db:
+        :param last_id:
+        :param batch_size:
+        :return:
+        """
+        batch = (
+            select(self.model.id)
+            .where(self.model.id > last_id)
+            .order_by(self.model.id)
+            .limit(batch_size)
+            .subquery()
+        )
+        return await db.scalar(select(func.max(batch.c.id)))
+
+    async def count_expired(
+        self, db: AsyncSession, start_id: int, end_id: int, before: datetime
+    ) -> int:
+        """
+        Count operation logs with start_id < id <= end_id created before the given time
+
+        :param db:
+        :param start_id:
+        :param end_id:
+        :param before:
+        :return:
+        """
+        stmt = select(func.count()).where(
+            self.model.id > start_id,
+            self.model.id <= end_id,
+            self.model.created_time < before,
+        )
+        return await db.scalar(stmt)
+
+    async def delete_expired(
+        self, db: AsyncSession, start_id: int, end_id: int, before: datetime
+    ) -> int:
+        """
+        Delete operation logs with start_id < id <= end_id created before the given time
+
+        :param db:
+        :param start_id:
+        :param end_id:
+        :param before:
+        :return:
+        """
+        stmt = delete(self.model).where(
+            self.model.id > start_id,
+            self.model.id <= end_id,
+            self.model.created_time < before,
+        )
+        result = await db.execute(stmt)
+        return result.rowcount
+
 
 opera_log_dao: CRUDOperaLogDao = CRUDOperaLogDao(OperaLog)
@@ -0,0 +1,170 @@
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import ColumnElement, Row, case, delete, desc, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy_crud_plus import CRUDPlus
+
+from backend.app.admin.model import OperaLogRollup
+
+
+class CRUDOperaLogRollup(CRUDPlus[OperaLogRollup]):
+
+    async def get_watermark(self, db: AsyncSession) -> int:
+        """
+        Get the id of the last rolled up operation log
+
+        :param db:
+        :return:
+        """
+        stmt = select(func.max(self.model.last_opera_log_id))
+        return await db.scalar(stmt) or 0
+
+    async def get_by_keys(
+        self, db: AsyncSession, keys: list[tuple]
+    ) -> Sequence[OperaLogRollup]:
+        """
+        Get the rollups of the given unique keys
+
+        :param db:
+        :param keys: (granularity, bucket_time, path, method, status, code, username)
+        :return:
+        """
+        stmt = select(self.model).where(
+            tuple_(
+                self.model.granularity,
+                self.model.bucket_time,
+                self.model.path,
+                self.model.method,
+                self.model.status,
+                self.model.code,
+                self.model.username,
+            ).in_(keys)
+        )
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    def _filter(
+        self,
+        granularity: str,
+        start_time: datetime,
+        end_time: datetime,
+        path: str | None = None,
+        method: str | None = None,
+        username: str | None = None,
+    ) -> list[ColumnElement[bool]]:
+        where_list = [
+            self.model.granularity == granularity,
+            self.model.bucket_time >= start_time,
+            self.model.bucket_time < end_time,
+        ]
+        if path is not None:
+            where_list.append(self.model.path == path)
+        if method is not None:
+            where_list.append(self.model.method == method.upper())
+        if username is not None:
+            where_list.append(self.model.username == username)
+        return where_list
+
+    async def get_groups(
+        self,
+        db: AsyncSession,
+        granularity: str,
+        start_time: datetime,
+        end_time: datetime,
+        group_by: str,
+        limit: int,
+        path: str | None = None,
+        method: str | None = None,
+        username: str | None = None,
+    ) -> Sequence[Row]:
+        """
+        Sum the rollups with start_time <= bucket_time < end_time by a column
+
+        :param db:
+        :param granularity:
+        :param start_time:
+        :param end_time:
+        :param group_by: bucket_time groups are in time order, other groups are
+            ordered by request count
+        :param limit:
+        :param path:
+        :param method:
+        :param username:
+        :return: key, count, error_count, total_cost and max_cost of each group
+        """
+        column = getattr(self.model, group_by)
+        count = func.sum(self.model.count)
+        stmt = (
+            select(
+                column.label("key"),
+                count.label("count"),
+                func.sum(
+                    case((self.model.status == 0, self.model.count), else_=0)
+                ).label("error_count"),
+                func.sum(self.model.total_cost).label("total_cost"),
+                func.max(self.model.max_cost).label("max_cost"),
+            )
+            .where(
+                *self._filter(granularity, start_time, end_time, path, method, username)
+            )
+            .group_by(column)
+            .order_by(column if group_by == "bucket_time" else desc(count))
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return result.all()
+
+    async def get_histograms(
+        self,
+        db: AsyncSession,
+        granularity: str,
+        start_time: datetime,
+        end_time: datetime,
+        group_by: str,
+        keys: list,
+        path: str | None = None,
+        method: str | None = None,
+        username: str | None = None,
+    ) -> Sequence[Row]:
+        """
+        Get the histograms of the rollups of the given groups
+
+        :param db:
+        :param granularity:
+        :param start_time:
+        :param end_time:
+        :param group_by:
+        :param keys: values of the group_by column
+        :param path:
+        :param method:
+        :param username:
+        :return: key and histogram of each rollup
+        """
+        column = getattr(self.model, group_by)
+        stmt = select(column.label("key"), self.model.histogram).where(
+            *self._filter(granularity, start_time, end_time, path, method, username),
+            column.in_(keys),
+        )
+        result = await db.execute(stmt)
+        return result.all()
+
+    async def delete_before(
+        self, db: AsyncSession, granularity: str, before: datetime
+    ) -> int:
+        """
+        Delete the rollups of a granularity with buckets before the given time
+
+        :param db:
+        :param granularity:
+        :param before:
+        :return:
+        """
+        stmt = delete(self.model).where(
+            self.model.granularity == granularity, self.model.bucket_time < before
+        )
+        result = await db.execute(stmt)
+        return result.rowcount
+
+
+opera_log_rollup_dao: CRUDOperaLogRollup = CRUDOperaLogRollup(OperaLogRollup)
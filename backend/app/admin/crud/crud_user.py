@@ -5,7 +5,7 @@ from sqlalchemy.orm import selectinload
 from sqlalchemy.sql import Select
 from sqlalchemy_crud_plus import CRUDPlus
 
-from backend.app.admin.model import Role, User
+from backend.app.admin.model import Dept, Role, User
 from backend.app.admin.schema.user import (
     AddUserParam,
     AvatarParam,
@@ -14,6 +14,7 @@ from backend.app.admin.schema.user import (
     UpdateUserRoleParam,
 )
 from backend.common.security.jwt import get_hash_password
+from backend.utils.sql import escape_like
 from backend.utils.timezone import timezone
 
 
@@ -74,7 +75,7 @@ class CRUDUser(CRUDPlus[User]):
         """
         if not social:
             salt = text_captcha(5)
-            obj.password = get_hash_password(f"{obj.password}{salt}")
+            obj.password = await get_hash_password(f"{obj.password}{salt}")
             dict_obj = obj.model_dump()
             dict_obj.update({"is_staff": True, "salt": salt})
         else:
@@ -92,7 +93,7 @@ class CRUDUser(CRUDPlus[User]):
         :return:
         """
         salt = text_captcha(5)
-        obj.password = get_hash_password(f"{obj.password}{salt}")
+        obj.password = await get_hash_password(f"{obj.password}{salt}")
         dict_obj = obj.model_dump(exclude={"roles"})
         dict_obj.update({"salt": salt})
         new_user = self.model(**dict_obj)
@@ -184,6 +185,8 @@ class CRUDUser(CRUDPlus[User]):
         username: str = None,
         phone: str = None,
         status: int = None,
+        dept_path: str | None = None,
+        with_relations: bool = True,
     ) -> Select:
         """
         Get user list
@@ -192,17 +195,25 @@ class CRUDUser(CRUDPlus[User]):
         :param username:
         :param phone:
         :param status:
+        :param dept_path: path of the dept, also list users of all its sub-depts
+        :param with_relations: load the dept and roles of the users
         :return:
         """
-        stmt = (
-            select(self.model)
-            .options(selectinload(self.model.dept))
-            .options(selectinload(self.model.roles).selectinload(Role.menus))
-            .order_by(desc(self.model.join_time))
-        )
+        stmt = select(self.model).order_by(desc(self.model.join_time))
+        if with_relations:
+            stmt = stmt.options(selectinload(self.model.dept)).options(
+                selectinload(self.model.roles).selectinload(Role.menus)
+            )
         where_list = []
         if dept:
-            where_list.append(self.model.dept_id == dept)
+            if dept_path is not None:
+                # A constant prefix pattern is a range scan of the path index
+                sub_dept_ids = select(Dept.id).where(
+                    Dept.path.like(f"{escape_like(dept_path)}%"), Dept.del_flag == 0
+                )
+                where_list.append(self.model.dept_id.in_(sub_dept_ids))
+            else:
+                where_list.append(self.model.dept_id == dept)
         if username:
             where_list.append(self.model.username.like(f"%{username}%"))
         if phone:
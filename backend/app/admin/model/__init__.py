@@ -7,6 +7,7 @@ from backend.app.admin.model.sys_dict_type import DictType
 from backend.app.admin.model.sys_login_log import LoginLog
 from backend.app.admin.model.sys_menu import Menu
 from backend.app.admin.model.sys_opera_log import OperaLog
+from backend.app.admin.model.sys_opera_log_rollup import OperaLogRollup
 from backend.app.admin.model.sys_role import Role
 from backend.app.admin.model.sys_user import User
 from backend.app.admin.model.sys_user_social import UserSocial
@@ -32,6 +32,9 @@ class Dept(Base):
         index=True,
         comment="Parent ID",
     )
+    path: Mapped[str] = mapped_column(
+        String(255), default="", index=True, comment="Ancestry path"
+    )  # /{root id}/.../{own id}/
     parent: Mapped[Union["Dept", None]] = relationship(
         init=False, back_populates="children", remote_side=[id]
     )
@@ -1,10 +1,12 @@
 from datetime import datetime
 
-from sqlalchemy import String
+from sqlalchemy import Index, String
 from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.orm import Mapped, mapped_column
 
-from backend.common.model import DataClassBase, id_key
+from backend.common.model import DataClassBase, id_key, log_partition_by
+from backend.core.conf import settings
+from backend.utils.log_search import fulltext_indexes
 from backend.utils.timezone import timezone
 
 
@@ -12,6 +14,19 @@ class LoginLog(DataClassBase):
     """Login log"""
 
     __tablename__ = "sys_login_log"
+    # Filters are combined with created_time, the order of every list
+    __table_args__ = (
+        Index("ix_sys_login_log_username", "username", "created_time"),
+        Index("ix_sys_login_log_ip", "ip", "created_time"),
+        Index("ix_sys_login_log_status", "status", "created_time"),
+        Index("ix_sys_login_log_created_time", "created_time"),
+        *fulltext_indexes(__tablename__, "username", "ip"),
+        (
+            {"mysql_partition_by": log_partition_by}
+            if settings.LOG_PARTITION_ENABLED
+            else {}
+        ),
+    )
 
     id: Mapped[id_key] = mapped_column(init=False)
     user_uuid: Mapped[str] = mapped_column(String(50), comment="User UUID")
@@ -29,6 +44,10 @@ class LoginLog(DataClassBase):
     device: Mapped[str | None] = mapped_column(String(50), comment="Device")
     msg: Mapped[str] = mapped_column(LONGTEXT, comment="Message")
     login_time: Mapped[datetime] = mapped_column(comment="Login time")
+    # MySQL requires the partition column in every unique key
     created_time: Mapped[datetime] = mapped_column(
-        init=False, default_factory=timezone.now, comment="Created time"
+        init=False,
+        default_factory=timezone.now,
+        primary_key=settings.LOG_PARTITION_ENABLED,
+        comment="Created time",
     )
@@ -1,10 +1,12 @@
 from datetime import datetime
 
-from sqlalchemy import String
+from sqlalchemy import Index, String
 from sqlalchemy.dialects.mysql import JSON, LONGTEXT
 from sqlalchemy.orm import Mapped, mapped_column
 
-from backend.common.model import DataClassBase, id_key
+from backend.common.model import DataClassBase, id_key, log_partition_by
+from backend.core.conf import settings
+from backend.utils.log_search import fulltext_indexes
 from backend.utils.timezone import timezone
 
 
@@ -12,6 +14,22 @@ class OperaLog(DataClassBase):
     """Operation log"""
 
     __tablename__ = "sys_opera_log"
+    # Filters are combined with created_time, the order of every list
+    __table_args__ = (
+        Index("ix_sys_opera_log_username", "username", "created_time"),
+        Index("ix_sys_opera_log_ip", "ip", "created_time"),
+        Index("ix_sys_opera_log_status", "status", "created_time"),
+        Index("ix_sys_opera_log_path", "path", "created_time"),
+        Index("ix_sys_opera_log_method", "method", "created_time"),
+        Index("ix_sys_opera_log_trace_id", "trace_id"),
+        Index("ix_sys_opera_log_created_time", "created_time"),
+        *fulltext_indexes(__tablename__, "username", "ip", "path"),
+        (
+            {"mysql_partition_by": log_partition_by}
+            if settings.LOG_PARTITION_ENABLED
+            else {}
+        ),
+    )
 
     id: Mapped[id_key] = mapped_column(init=False)
     trace_id: Mapped[str] = mapped_column(String(32), comment="Trace ID")
@@ -39,6 +57,10 @@ class OperaLog(DataClassBase):
         insert_default=0.0, comment="Cost time"
     )  # Unit: s
     opera_time: Mapped[datetime] = mapped_column(comment="Operation time")
+    # MySQL requires the partition column in every unique key
     created_time: Mapped[datetime] = mapped_column(
-        init=False, default_factory=timezone.now, comment="Created time"
+        init=False,
+        default_factory=timezone.now,
+        primary_key=settings.LOG_PARTITION_ENABLED,
+        comment="Created time",
     )
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from sqlalchemy import String, UniqueConstraint
+from sqlalchemy.dialects.mysql import JSON
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.common.model import DataClassBase, id_key
+
+
+class OperaLogRollup(DataClassBase):
+    """Operation log rollup"""
+
+    __tablename__ = "sys_opera_log_rollup"
+    __table_args__ = (
+        # Leads with (granularity, bucket_time), so it also serves bucket range scans
+        UniqueConstraint(
+            "granularity",
+            "bucket_time",
+            "path",
+            "method",
+            "status",
+            "code",
+            "username",
+            name="uq_sys_opera_log_rollup_key",
+        ),
+    )
+
+    id: Mapped[id_key] = mapped_column(init=False)
+    granularity: Mapped[str] = mapped_column(
+        String(10), comment="Granularity"
+    )  # minute, hour, day
+    bucket_time: Mapped[datetime] = mapped_column(comment="Bucket start time")
+    path: Mapped[str] = mapped_column(String(500), comment="Request path")
+    method: Mapped[str] = mapped_column(String(20), comment="Request method")
+    status: Mapped[int] = mapped_column(
+        comment="Operation status"
+    )  # 0: Fail, 1: Success
+    code: Mapped[str] = mapped_column(String(20), comment="Response code")
+    # Not null, NULLs would never collide in the unique key
+    username: Mapped[str] = mapped_column(
+        String(20), comment="Username"
+    )  # Empty for anonymous requests
+    count: Mapped[int] = mapped_column(comment="Request count")
+    total_cost: Mapped[float] = mapped_column(comment="Total cost time")  # Unit: s
+    max_cost: Mapped[float] = mapped_column(comment="Max cost time")  # Unit: s
+    histogram: Mapped[dict] = mapped_column(
+        JSON(), comment="Cost time histogram"
+    )  # LogHistogram buckets
+    # The rollup watermark is the max over all rows, updated in the same transaction
+    last_opera_log_id: Mapped[int] = mapped_column(
+        index=True, comment="Last rolled up operation log id"
+    )
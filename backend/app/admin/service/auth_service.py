@@ -15,9 +15,11 @@ from backend.common.security.jwt import (
     create_access_token,
     create_new_token,
     create_refresh_token,
+    delete_all_token,
+    delete_token,
     get_token,
     jwt_decode,
-    password_verify,
+    password_verify_and_update,
 )
 from backend.core.conf import settings
 from backend.database.db_mysql import async_db_session
@@ -33,14 +35,17 @@ class AuthService:
             current_user = await user_dao.get_by_username(db, obj.username)
             if not current_user:
                 raise errors.NotFoundError(msg="Username or password is incorrect")
-            elif not password_verify(
+            verified, new_hash = await password_verify_and_update(
                 f"{obj.password}{current_user.salt}", current_user.password
-            ):
+            )
+            if not verified:
                 raise errors.AuthorizationError(msg="Username or password is incorrect")
             elif not current_user.status:
                 raise errors.AuthorizationError(
                     msg="The user has been locked, please contact the system administrator"
                 )
+            if new_hash:
+                await user_dao.reset_password(db, current_user.id, new_hash)
             access_token = await create_access_token(
                 str(current_user.id), current_user.is_multi_login
             )
@@ -62,9 +67,10 @@ class AuthService:
                     raise errors.NotFoundError(msg="Username or password is incorrect")
                 user_uuid = current_user.uuid
                 username = current_user.username
-                if not password_verify(
+                verified, new_hash = await password_verify_and_update(
                     obj.password + current_user.salt, current_user.password
-                ):
+                )
+                if not verified:
                     raise errors.AuthorizationError(
                         msg="Username or password is incorrect"
                     )
@@ -123,6 +129,8 @@ class AuthService:
                     f"{admin_settings.CAPTCHA_LOGIN_REDIS_PREFIX}:{request.state.ip}"
                 )
                 await user_dao.update_login_time(db, obj.username)
+                if new_hash:
+                    await user_dao.reset_password(db, current_user_id, new_hash)
                 response.set_cookie(
                     key=settings.COOKIE_REFRESH_TOKEN_KEY,
                     value=refresh_token.refresh_token,
@@ -183,16 +191,11 @@ class AuthService:
         refresh_token = request.cookies.get(settings.COOKIE_REFRESH_TOKEN_KEY)
         response.delete_cookie(settings.COOKIE_REFRESH_TOKEN_KEY)
         if request.user.is_multi_login:
-            key = f"{settings.TOKEN_REDIS_PREFIX}:{request.user.id}:{token}"
-            await redis_client.delete(key)
-            if refresh_token:
-                key = f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{request.user.id}:{refresh_token}"
-                await redis_client.delete(key)
+            await delete_token(
+                request.user.id, token=token, refresh_token=refresh_token
+            )
         else:
-            key_prefix = f"{settings.TOKEN_REDIS_PREFIX}:{request.user.id}:"
-            await redis_client.delete_prefix(key_prefix)
-            key_prefix = f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{request.user.id}:"
-            await redis_client.delete_prefix(key_prefix)
+            await delete_all_token(request.user.id)
 
 
 auth_service = AuthService()
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+from collections import deque
+
+from fast_captcha import img_captcha
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.admin.conf import admin_settings
+from backend.common.log import log
+from backend.utils.metrics import metrics
+
+
+class CaptchaPool:
+    """
+    Per-worker pool of pre-rendered captchas
+
+    A background task renders captchas one at a time until the pool is full,
+    so requests only pop a ready image. Each captcha is handed out once
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._pool: deque[tuple[str, str]] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        metrics.register_gauge("captcha_pool_size", lambda: len(self._pool))
+
+    @staticmethod
+    async def render() -> tuple[str, str]:
+        """
+        Render a captcha in the thread pool
+
+        :return: base64 image and code
+        """
+        start_time = time.perf_counter()
+        img, code = await run_in_threadpool(img_captcha, img_byte="base64")
+        metrics.observe("captcha_render", time.perf_counter() - start_time)
+        return img, code
+
+    async def get(self) -> tuple[str, str]:
+        """
+        Get a captcha, rendered on demand when the pool is empty
+
+        :return: base64 image and code
+        """
+        self._wakeup.set()
+        try:
+            return self._pool.popleft()
+        except IndexError:
+            metrics.incr("captcha_pool_miss")
+            return await self.render()
+
+    async def start(self) -> None:
+        """
+        Start refill task
+
+        :return:
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Stop refill task
+
+        :return:
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._pool.clear()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            while len(self._pool) < self._size:
+                try:
+                    self._pool.append(await self.render())
+                except Exception as e:
+                    log.error(f"Captcha render failed: {e}")
+                    await asyncio.sleep(1)
+                    continue
+                metrics.incr("captcha_pool_refilled")
+            await self._wakeup.wait()
+
+
+captcha_pool: CaptchaPool = CaptchaPool(admin_settings.CAPTCHA_POOL_SIZE)
@@ -37,6 +37,7 @@ class CasbinService:
         data = await enforcer.add_policy(p.sub, p.path, p.method)
         if not data:
             raise errors.ForbiddenError(msg="Permission already exists")
+        await rbac.notify_policy_change()
         return data
 
     @staticmethod
@@ -45,6 +46,7 @@ class CasbinService:
         data = await enforcer.add_policies([list(p.model_dump().values()) for p in ps])
         if not data:
             raise errors.ForbiddenError(msg="Permission already exists")
+        await rbac.notify_policy_change()
         return data
 
     @staticmethod
@@ -56,6 +58,7 @@ class CasbinService:
         data = await enforcer.update_policy(
             [old.sub, old.path, old.method], [new.sub, new.path, new.method]
         )
+        await rbac.notify_policy_change()
         return data
 
     @staticmethod
@@ -67,6 +70,7 @@ class CasbinService:
             [list(o.model_dump().values()) for o in old],
             [list(n.model_dump().values()) for n in new],
         )
+        await rbac.notify_policy_change()
         return data
 
     @staticmethod
@@ -76,6 +80,7 @@ class CasbinService:
         if not _p:
             raise errors.NotFoundError(msg="Permission does not exist")
         data = await enforcer.remove_policy(p.sub, p.path, p.method)
+        await rbac.notify_policy_change()
         return data
 
     @staticmethod
@@ -86,12 +91,14 @@ class CasbinService:
         )
         if not data:
             raise errors.NotFoundError(msg="Permission does not exist")
+        await rbac.notify_policy_change()
         return data
 
     @staticmethod
     async def delete_all_policies(*, sub: DeleteAllPoliciesParam) -> int:
         async with async_db_session.begin() as db:
             count = await casbin_dao.delete_policies_by_sub(db, sub)
+        await rbac.notify_policy_change()
         return count
 
     @staticmethod
@@ -106,6 +113,7 @@ class CasbinService:
         data = await enforcer.add_grouping_policy(g.uuid, g.role)
         if not data:
             raise errors.ForbiddenError(msg="Permission already exists")
+        await rbac.notify_policy_change()
         return data
 
     @staticmethod
@@ -116,6 +124,7 @@ class CasbinService:
         )
         if not data:
             raise errors.ForbiddenError(msg="Permission already exists")
+        await rbac.notify_policy_change()
         return data
 
     @staticmethod
@@ -125,6 +134,7 @@ class CasbinService:
         if not _g:
             raise errors.NotFoundError(msg="Permission does not exist")
         data = await enforcer.remove_grouping_policy(g.uuid, g.role)
+        await rbac.notify_policy_change()
         return data
 
     @staticmethod
@@ -135,12 +145,14 @@ class CasbinService:
         )
         if not data:
             raise errors.NotFoundError(msg="Permission does not exist")
+        await rbac.notify_policy_change()
         return data
 
     @staticmethod
     async def delete_all_groups(*, uuid: UUID) -> int:
         async with async_db_session.begin() as db:
             count = await casbin_dao.delete_groups_by_uuid(db, uuid)
+        await rbac.notify_policy_change()
         return count
 
 
@@ -1,11 +1,11 @@
-from typing import Any
-
 from backend.app.admin.crud.crud_dept import dept_dao
 from backend.app.admin.model import Dept
 from backend.app.admin.schema.dept import CreateDeptParam, UpdateDeptParam
+from backend.common.dataclasses import SerializedData
 from backend.common.exception import errors
 from backend.database.db_mysql import async_db_session
 from backend.utils.build_tree import get_tree_data
+from backend.utils.tree_cache import tree_cache
 
 
 class DeptService:
@@ -24,14 +24,16 @@ class DeptService:
         name: str | None = None,
         leader: str | None = None,
         phone: str | None = None,
-        status: int | None = None
-    ) -> list[dict[str, Any]]:
-        async with async_db_session() as db:
-            dept_select = await dept_dao.get_all(
-                db=db, name=name, leader=leader, phone=phone, status=status
-            )
-            tree_data = get_tree_data(dept_select)
-            return tree_data
+        status: int | None = None,
+    ) -> SerializedData:
+        async def load():
+            async with async_db_session() as db:
+                dept_select = await dept_dao.get_all(
+                    db=db, name=name, leader=leader, phone=phone, status=status
+                )
+                return get_tree_data(dept_select)
+
+        return await tree_cache.get(("dept", name, leader, phone, status), load)
 
     @staticmethod
     async def create(*, obj: CreateDeptParam) -> None:
@@ -39,11 +41,13 @@ class DeptService:
             dept = await dept_dao.get_by_name(db, obj.name)
             if dept:
                 raise errors.ForbiddenError(msg="Department already exists")
+            parent_dept = None
             if obj.parent_id:
                 parent_dept = await dept_dao.get(db, obj.parent_id)
                 if not parent_dept:
                     raise errors.NotFoundError(msg="Parent department does not exist")
-            await dept_dao.create(db, obj)
+            await dept_dao.create(db, obj, parent_dept)
+        await tree_cache.notify_change()
 
     @staticmethod
     async def update(*, pk: int, obj: UpdateDeptParam) -> int:
@@ -54,6 +58,7 @@ class DeptService:
             if dept.name != obj.name:
                 if await dept_dao.get_by_name(db, obj.name):
                     raise errors.ForbiddenError(msg="Department already exists")
+            parent_dept = None
             if obj.parent_id:
                 parent_dept = await dept_dao.get(db, obj.parent_id)
                 if not parent_dept:
@@ -62,8 +67,23 @@ class DeptService:
                 raise errors.ForbiddenError(
                     msg="Cannot set the parent department to itself"
                 )
+            old_parent_id, old_path = dept.parent_id, dept.path
+            if obj.parent_id != old_parent_id:
+                # An empty path is a prefix of every path
+                if not old_path or (parent_dept and not parent_dept.path):
+                    raise errors.ServerError(
+                        msg="Department paths are missing, run backfill_dept_path.py"
+                    )
+                if parent_dept and parent_dept.path.startswith(old_path):
+                    raise errors.ForbiddenError(
+                        msg="Cannot set the parent department to its sub-department"
+                    )
             count = await dept_dao.update(db, pk, obj)
-            return count
+            if obj.parent_id != old_parent_id:
+                new_path = f"{parent_dept.path if parent_dept else '/'}{pk}/"
+                await dept_dao.update_path(db, old_path, new_path)
+        await tree_cache.notify_change()
+        return count
 
     @staticmethod
     async def delete(*, pk: int) -> int:
@@ -79,7 +99,8 @@ class DeptService:
                     msg="Department has sub-departments, cannot be deleted"
                 )
             count = await dept_dao.delete(db, pk)
-            return count
+        await tree_cache.notify_change()
+        return count
 
 
 dept_service = DeptService()
@@ -0,0 +1,163 @@
+import gzip
+import io
+import os
+
+from datetime import date, datetime, timedelta
+from typing import IO, Any, Iterator
+
+import msgspec
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.admin.crud.crud_login_log import CRUDLoginLog
+from backend.app.admin.crud.crud_opera_log import CRUDOperaLogDao
+from backend.core.conf import settings
+
+_encoder = msgspec.json.Encoder()
+
+
+def _open(path: str, mode: str) -> IO[bytes]:
+    """
+    Open a local file, or an object storage file through fsspec
+
+    :param path:
+    :param mode:
+    :return:
+    """
+    if "://" in path:
+        import fsspec
+
+        return fsspec.open(path, mode, **settings.LOG_ARCHIVE_STORAGE_OPTIONS).open()
+    if "w" in mode:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(path, mode)
+
+
+def _list(path: str) -> list[str]:
+    """
+    List the files of a directory, empty if it does not exist
+
+    :param path:
+    :return:
+    """
+    if "://" in path:
+        from fsspec.core import url_to_fs
+
+        fs, fs_path = url_to_fs(path, **settings.LOG_ARCHIVE_STORAGE_OPTIONS)
+        if not fs.exists(fs_path):
+            return []
+        return sorted(fs.unstrip_protocol(f) for f in fs.ls(fs_path, detail=False))
+    if not os.path.isdir(path):
+        return []
+    return sorted(os.path.join(path, name) for name in os.listdir(path))
+
+
+def _write(path: str, lines: list[bytes]) -> None:
+    data = b"\n".join(lines) + b"\n"
+    if settings.LOG_ARCHIVE_COMPRESSION == "zstd":
+        import zstandard
+
+        data = zstandard.ZstdCompressor().compress(data)
+    else:
+        data = gzip.compress(data)
+    with _open(path, "wb") as f:
+        f.write(data)
+
+
+def _read(path: str) -> Iterator[bytes]:
+    with _open(path, "rb") as f:
+        if path.endswith(".zst"):
+            import zstandard
+
+            reader = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(f))
+        else:
+            reader = gzip.GzipFile(fileobj=f)
+        with reader:
+            yield from reader
+
+
+class LogArchiveService:
+
+    @staticmethod
+    def get_day_path(table: str, day: date) -> str:
+        return f"{settings.LOG_ARCHIVE_PATH}/{table}/date={day:%Y-%m-%d}"
+
+    @staticmethod
+    async def archive(
+        db: AsyncSession,
+        dao: CRUDOperaLogDao | CRUDLoginLog,
+        start_id: int,
+        end_id: int,
+        before: datetime,
+    ) -> int:
+        """
+        将 start_id < id <= end_id 范围内的过期日志按创建日期写入压缩的 NDJSON 文件
+
+        Rows are read through a server side cursor, each file is named after the
+        first and last id of its rows, so a range archived again after a failed
+        delete overwrites its own files and never the files of other runs
+
+        :param db:
+        :param dao:
+        :param start_id:
+        :param end_id:
+        :param before:
+        :return: The number of archived logs
+        """
+        table = dao.model.__table__
+        stmt = (
+            select(table)
+            .where(
+                table.c.id > start_id,
+                table.c.id <= end_id,
+                table.c.created_time < before,
+            )
+            .order_by(table.c.id)
+            .execution_options(yield_per=1000)
+        )
+        days: dict[date, list[bytes]] = {}
+        day_ids: dict[date, tuple[int, int]] = {}
+        result = await db.stream(stmt)
+        async for row in result.mappings():
+            day = row["created_time"].date()
+            days.setdefault(day, []).append(_encoder.encode(dict(row)))
+            # Rows are in id order
+            day_ids[day] = (day_ids.get(day, (row["id"],))[0], row["id"])
+        suffix = "zst" if settings.LOG_ARCHIVE_COMPRESSION == "zstd" else "gz"
+        for day, lines in days.items():
+            path = LogArchiveService.get_day_path(table.name, day)
+            first_id, last_id = day_ids[day]
+            await run_in_threadpool(
+                _write, f"{path}/{first_id}-{last_id}.ndjson.{suffix}", lines
+            )
+        return sum(len(lines) for lines in days.values())
+
+    @staticmethod
+    def read(
+        table: str, start_date: date, end_date: date, **filters: Any
+    ) -> Iterator[bytes]:
+        """
+        按天逐个文件读取归档日志，不写回数据库
+
+        :param table:
+        :param start_date:
+        :param end_date: inclusive
+        :param filters: exact matches of log fields, None is ignored
+        :return: NDJSON lines
+        """
+        filters = {k: v for k, v in filters.items() if v is not None}
+        day = start_date
+        while day <= end_date:
+            for path in _list(LogArchiveService.get_day_path(table, day)):
+                for line in _read(path):
+                    if filters:
+                        obj = msgspec.json.decode(line)
+                        if any(obj.get(k) != v for k, v in filters.items()):
+                            continue
+                    yield line
+            day += timedelta(days=1)
+
+
+log_archive_service = LogArchiveService()
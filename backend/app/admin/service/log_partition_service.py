@@ -0,0 +1,152 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.admin.model import LoginLog, OperaLog
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.database.db_mysql import async_db_session
+from backend.utils.timezone import timezone
+
+
+def month_start(dt: date | datetime, months: int = 0) -> date:
+    """
+    Get the first day of the month, shifted by the given number of months
+
+    :param dt:
+    :param months:
+    :return:
+    """
+    year, month = divmod(dt.year * 12 + dt.month - 1 + months, 12)
+    return date(year, month + 1, 1)
+
+
+def month_partition(month: date) -> str:
+    """
+    Partition definition holding the rows of the given month
+
+    :param month: first day of the month
+    :return:
+    """
+    return (
+        f"PARTITION p{month:%Y%m} "
+        f"VALUES LESS THAN ('{month_start(month, 1):%Y-%m-%d}')"
+    )
+
+
+class LogPartitionService:
+
+    @staticmethod
+    async def get_partition_months(
+        db: AsyncSession, model: type[OperaLog | LoginLog]
+    ) -> list[date] | None:
+        """
+        Get the months of the existing month partitions
+
+        :param db:
+        :param model:
+        :return: None if the table is not partitioned
+        """
+        stmt = text(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name "
+            "AND PARTITION_NAME IS NOT NULL"
+        )
+        result = await db.execute(stmt, {"table_name": model.__tablename__})
+        names = result.scalars().all()
+        if not names:
+            return None
+        return sorted(
+            datetime.strptime(name, "p%Y%m").date()
+            for name in names
+            if name != "p_future"
+        )
+
+    @staticmethod
+    async def create_partitions(
+        db: AsyncSession, model: type[OperaLog | LoginLog], months: list[date]
+    ) -> None:
+        """
+        Split month partitions off p_future, months must be after the existing ones
+
+        :param db:
+        :param model:
+        :param months:
+        :return:
+        """
+        partitions = ", ".join(month_partition(month) for month in months)
+        await db.execute(
+            text(
+                f"ALTER TABLE {model.__tablename__} REORGANIZE PARTITION p_future "
+                f"INTO ({partitions}, PARTITION p_future VALUES LESS THAN (MAXVALUE))"
+            )
+        )
+
+    @staticmethod
+    async def drop_partitions(
+        db: AsyncSession, model: type[OperaLog | LoginLog], months: list[date]
+    ) -> None:
+        """
+        Drop month partitions with all their rows
+
+        :param db:
+        :param model:
+        :param months:
+        :return:
+        """
+        partitions = ", ".join(f"p{month:%Y%m}" for month in months)
+        await db.execute(
+            text(f"ALTER TABLE {model.__tablename__} DROP PARTITION {partitions}")
+        )
+
+    @staticmethod
+    async def maintain(
+        model: type[OperaLog | LoginLog], *, retention_days: int
+    ) -> dict[str, list[str]]:
+        """
+        Pre-create the partitions of the next LOG_PARTITION_PRECREATE_MONTHS months
+        and drop the partitions whose rows are all older than the retention
+
+        :param model:
+        :param retention_days:
+        :return: names of the created and dropped partitions
+        """
+        result = {"created": [], "dropped": []}
+        if not settings.LOG_PARTITION_ENABLED:
+            return result
+        async with async_db_session() as db:
+            if db.bind.dialect.name != "mysql":
+                return result
+            months = await LogPartitionService.get_partition_months(db, model)
+            if months is None:
+                log.warning(
+                    f"{model.__tablename__} is not partitioned, "
+                    f"run scripts/partition_log_tables.py to convert it"
+                )
+                return result
+            now = timezone.now()
+            # Continue after the last partition so ranges stay contiguous
+            first = month_start(months[-1], 1) if months else month_start(now)
+            last = month_start(now, settings.LOG_PARTITION_PRECREATE_MONTHS)
+            created = []
+            while first <= last:
+                created.append(first)
+                first = month_start(first, 1)
+            if created:
+                await LogPartitionService.create_partitions(db, model, created)
+            # A partition holds the rows before the start of the next month
+            before = (now - timedelta(days=retention_days)).date()
+            dropped = [month for month in months if month_start(month, 1) <= before]
+            if dropped:
+                await LogPartitionService.drop_partitions(db, model, dropped)
+        result["created"] = [f"p{month:%Y%m}" for month in created]
+        result["dropped"] = [f"p{month:%Y%m}" for month in dropped]
+        log.info(
+            f"Created partitions {result['created']} and dropped partitions "
+            f"{result['dropped']} of {model.__tablename__}"
+        )
+        return result
+
+
+log_partition_service = LogPartitionService()
@@ -0,0 +1,74 @@
+import asyncio
+
+from datetime import timedelta
+from typing import Callable
+
+from backend.app.admin.crud.crud_login_log import CRUDLoginLog
+from backend.app.admin.crud.crud_opera_log import CRUDOperaLogDao
+from backend.app.admin.service.log_archive_service import log_archive_service
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.database.db_mysql import async_db_session
+from backend.utils.timezone import timezone
+
+
+class LogRetentionService:
+
+    @staticmethod
+    async def delete_expired(
+        dao: CRUDOperaLogDao | CRUDLoginLog,
+        *,
+        retention_days: int,
+        dry_run: bool = False,
+        archive: bool = False,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> int:
+        """
+        删除超过保留天数的日志
+
+        Logs are walked in primary key ranges of LOG_RETENTION_BATCH_SIZE
+        rows, each range is deleted in its own short transaction with a pause
+        in between. Logs are written in id order, so the walk stops at the
+        first range without expired logs
+
+        :param dao:
+        :param retention_days:
+        :param dry_run: only count the logs that would be deleted
+        :param archive: write the logs of each range to the archive before deleting
+        :param progress: called with the affected rows so far and the last id
+        :return: The number of deleted (or counted) logs
+        """
+        before = timezone.now() - timedelta(days=retention_days)
+        table = dao.model.__tablename__
+        total = 0
+        last_id = 0
+        while True:
+            async with async_db_session.begin() as db:
+                end_id = await dao.get_batch_max_id(
+                    db, last_id, settings.LOG_RETENTION_BATCH_SIZE
+                )
+                if end_id is None:
+                    break
+                if dry_run:
+                    count = await dao.count_expired(db, last_id, end_id, before)
+                else:
+                    if archive:
+                        await log_archive_service.archive(
+                            db, dao, last_id, end_id, before
+                        )
+                    count = await dao.delete_expired(db, last_id, end_id, before)
+            if not count:
+                break
+            total += count
+            last_id = end_id
+            if progress:
+                progress(total, last_id)
+            log.info(
+                f"{'Counted' if dry_run else 'Deleted'} {total} expired logs "
+                f"of {table} up to id {last_id}"
+            )
+            await asyncio.sleep(settings.LOG_RETENTION_BATCH_INTERVAL_MS / 1000)
+        return total
+
+
+log_retention_service = LogRetentionService()
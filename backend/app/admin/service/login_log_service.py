@@ -6,15 +6,32 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.admin.crud.crud_login_log import login_log_dao
 from backend.app.admin.schema.login_log import CreateLoginLogParam
+from backend.common.enums import MatchType
 from backend.common.log import log
 from backend.database.db_mysql import async_db_session
+from backend.utils.request_parse import enrich_request_state
 
 
 class LoginLogService:
 
     @staticmethod
-    async def get_select(*, username: str, status: int, ip: str) -> Select:
-        return await login_log_dao.get_list(username=username, status=status, ip=ip)
+    async def get_select(
+        *,
+        username: str,
+        status: int,
+        ip: str,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+        match_type: MatchType = MatchType.prefix,
+    ) -> Select:
+        return await login_log_dao.get_list(
+            username=username,
+            status=status,
+            ip=ip,
+            start_time=start_time,
+            end_time=end_time,
+            match_type=match_type,
+        )
 
     @staticmethod
     async def create(
@@ -28,6 +45,8 @@ class LoginLogService:
         msg: str,
     ) -> None:
         try:
+            # Runs as a background task, after the response has been sent
+            await enrich_request_state(request)
             obj_in = CreateLoginLogParam(
                 user_uuid=user_uuid,
                 username=username,
@@ -1,16 +1,15 @@
-from typing import Any
-
 from fastapi import Request
 
 from backend.app.admin.crud.crud_menu import menu_dao
 from backend.app.admin.crud.crud_role import role_dao
 from backend.app.admin.model import Menu
 from backend.app.admin.schema.menu import CreateMenuParam, UpdateMenuParam
+from backend.common.dataclasses import SerializedData
 from backend.common.exception import errors
-from backend.core.conf import settings
+from backend.common.security.rbac import rbac
 from backend.database.db_mysql import async_db_session
-from backend.database.db_redis import redis_client
 from backend.utils.build_tree import get_tree_data
+from backend.utils.tree_cache import tree_cache
 
 
 class MenuService:
@@ -26,37 +25,44 @@ class MenuService:
     @staticmethod
     async def get_menu_tree(
         *, title: str | None = None, status: int | None = None
-    ) -> list[dict[str, Any]]:
-        async with async_db_session() as db:
-            menu_select = await menu_dao.get_all(db, title=title, status=status)
-            menu_tree = get_tree_data(menu_select)
-            return menu_tree
+    ) -> SerializedData:
+        async def load():
+            async with async_db_session() as db:
+                menu_select = await menu_dao.get_all(db, title=title, status=status)
+                return get_tree_data(menu_select)
+
+        return await tree_cache.get(("menu", title, status), load)
 
     @staticmethod
-    async def get_role_menu_tree(*, pk: int) -> list[dict[str, Any]]:
-        async with async_db_session() as db:
-            role = await role_dao.get_with_relation(db, pk)
-            if not role:
-                raise errors.NotFoundError(msg="Role does not exist")
-            menu_ids = [menu.id for menu in role.menus]
-            menu_select = await menu_dao.get_role_menus(db, False, menu_ids)
-            menu_tree = get_tree_data(menu_select)
-            return menu_tree
+    async def get_role_menu_tree(*, pk: int) -> SerializedData:
+        async def load():
+            async with async_db_session() as db:
+                role = await role_dao.get_with_relation(db, pk)
+                if not role:
+                    raise errors.NotFoundError(msg="Role does not exist")
+                menu_ids = [menu.id for menu in role.menus]
+                menu_select = await menu_dao.get_role_menus(db, False, menu_ids)
+                return get_tree_data(menu_select)
+
+        return await tree_cache.get(("role_menu", pk), load)
 
     @staticmethod
-    async def get_user_menu_tree(*, request: Request) -> list[dict[str, Any]]:
-        async with async_db_session() as db:
-            roles = request.user.roles
-            menu_ids = []
-            menu_tree = []
-            if roles:
-                for role in roles:
-                    menu_ids.extend([menu.id for menu in role.menus])
-                menu_select = await menu_dao.get_role_menus(
-                    db, request.user.is_superuser, menu_ids
-                )
-                menu_tree = get_tree_data(menu_select)
-            return menu_tree
+    async def get_user_menu_tree(*, request: Request) -> SerializedData:
+        superuser = request.user.is_superuser
+        role_set = tuple(sorted({role.id for role in request.user.roles}))
+
+        async def load():
+            # The entry is shared by every user with these roles, so menus are read
+            # from the database instead of the per-user cached roles
+            async with async_db_session() as db:
+                menu_tree = []
+                if role_set:
+                    menu_ids = await menu_dao.get_role_menu_ids(db, list(role_set))
+                    menu_select = await menu_dao.get_role_menus(db, superuser, menu_ids)
+                    menu_tree = get_tree_data(menu_select)
+                return menu_tree
+
+        return await tree_cache.get(("user_menu", superuser, role_set), load)
 
     @staticmethod
     async def create(*, obj: CreateMenuParam) -> None:
@@ -69,6 +75,7 @@ class MenuService:
                 if not parent_menu:
                     raise errors.NotFoundError(msg="Parent menu does not exist")
             await menu_dao.create(db, obj)
+        await tree_cache.notify_change()
 
     @staticmethod
     async def update(*, pk: int, obj: UpdateMenuParam) -> int:
@@ -88,8 +95,9 @@ class MenuService:
                     msg="Do not allow the parent menu to be itself"
                 )
             count = await menu_dao.update(db, pk, obj)
-            await redis_client.delete_prefix(settings.PERMISSION_REDIS_PREFIX)
-            return count
+        await rbac.notify_role_menu_change()
+        await tree_cache.notify_change()
+        return count
 
     @staticmethod
     async def delete(*, pk: int) -> int:
@@ -100,7 +108,9 @@ class MenuService:
                     msg="There are submenus under the menu and cannot be deleted."
                 )
             count = await menu_dao.delete(db, pk)
-            return count
+        await rbac.notify_role_menu_change()
+        await tree_cache.notify_change()
+        return count
 
 
 menu_service = MenuService()
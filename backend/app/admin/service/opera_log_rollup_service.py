@@ -0,0 +1,244 @@
+from datetime import datetime, timedelta
+from itertools import takewhile
+from typing import Any, Literal, Sequence
+
+from redis.exceptions import LockError
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.admin.crud.crud_opera_log import opera_log_dao
+from backend.app.admin.crud.crud_opera_log_rollup import opera_log_rollup_dao
+from backend.app.admin.model import OperaLogRollup
+from backend.common.enums import RollupGranularity
+from backend.common.exception import errors
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.database.db_mysql import async_db_session
+from backend.database.db_redis import redis_client
+from backend.utils.histogram import LogHistogram
+from backend.utils.timezone import timezone
+
+RollupKey = tuple[str, datetime, str, str, int, str, str]
+
+
+def truncate(dt: datetime, granularity: RollupGranularity) -> datetime:
+    """
+    Get the start time of the bucket of dt
+
+    :param dt:
+    :param granularity:
+    :return:
+    """
+    if granularity == RollupGranularity.minute:
+        return dt.replace(second=0, microsecond=0)
+    if granularity == RollupGranularity.hour:
+        return dt.replace(minute=0, second=0, microsecond=0)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class OperaLogRollupService:
+
+    @staticmethod
+    def _histogram(data: dict | None = None) -> LogHistogram:
+        return LogHistogram.from_dict(
+            data or {}, settings.OPERA_LOG_ROLLUP_HISTOGRAM_ACCURACY
+        )
+
+    @staticmethod
+    async def _rollup_batch(db: AsyncSession, logs: Sequence[Row]) -> None:
+        """
+        Merge a batch of operation logs into the rollups of every granularity
+
+        :param db:
+        :param logs:
+        :return:
+        """
+        groups: dict[RollupKey, dict[str, Any]] = {}
+        for granularity in RollupGranularity:
+            for item in logs:
+                key = (
+                    granularity.value,
+                    truncate(item.created_time, granularity),
+                    item.path,
+                    item.method,
+                    item.status,
+                    item.code,
+                    item.username or "",
+                )
+                group = groups.get(key)
+                if group is None:
+                    group = {
+                        "count": 0,
+                        "total_cost": 0.0,
+                        "max_cost": 0.0,
+                        "histogram": OperaLogRollupService._histogram(),
+                    }
+                    groups[key] = group
+                group["count"] += 1
+                group["total_cost"] += item.cost_time
+                group["max_cost"] = max(group["max_cost"], item.cost_time)
+                group["histogram"].add(item.cost_time)
+        last_id = logs[-1].id
+        rows = await opera_log_rollup_dao.get_by_keys(db, list(groups))
+        for row in rows:
+            key = (
+                row.granularity,
+                row.bucket_time,
+                row.path,
+                row.method,
+                row.status,
+                row.code,
+                row.username,
+            )
+            group = groups.pop(key, None)
+            if group is None:
+                continue
+            histogram = OperaLogRollupService._histogram(row.histogram)
+            histogram.merge(group["histogram"])
+            row.count += group["count"]
+            row.total_cost += group["total_cost"]
+            row.max_cost = max(row.max_cost, group["max_cost"])
+            row.histogram = histogram.to_dict()
+            row.last_opera_log_id = last_id
+        for key, group in groups.items():
+            granularity, bucket_time, path, method, status, code, username = key
+            db.add(
+                OperaLogRollup(
+                    granularity=granularity,
+                    bucket_time=bucket_time,
+                    path=path,
+                    method=method,
+                    status=status,
+                    code=code,
+                    username=username,
+                    count=group["count"],
+                    total_cost=group["total_cost"],
+                    max_cost=group["max_cost"],
+                    histogram=group["histogram"].to_dict(),
+                    last_opera_log_id=last_id,
+                )
+            )
+
+    @staticmethod
+    async def rollup() -> int:
+        """
+        Roll up new operation logs in id batches, one transaction per batch
+
+        The watermark is stored in the rollups themselves, so every log is counted
+        exactly once, a redis lock keeps runs from overlapping
+
+        :return: The number of rolled up logs
+        """
+        lock = redis_client.lock(
+            settings.OPERA_LOG_ROLLUP_LOCK_REDIS_KEY,
+            timeout=settings.OPERA_LOG_ROLLUP_LOCK_TIMEOUT_SECONDS,
+        )
+        if not await lock.acquire(blocking=False):
+            log.info("Operation log rollup is already running")
+            return 0
+        total = 0
+        try:
+            # DATETIME columns hold naive local times
+            before = timezone.now().replace(tzinfo=None) - timedelta(
+                seconds=settings.OPERA_LOG_ROLLUP_DELAY_SECONDS
+            )
+            while True:
+                async with async_db_session.begin() as db:
+                    last_id = await opera_log_rollup_dao.get_watermark(db)
+                    logs = await opera_log_dao.get_rollup_batch(
+                        db, last_id, settings.OPERA_LOG_ROLLUP_BATCH_SIZE
+                    )
+                    # Stop at the first recent log, the watermark must not pass it
+                    logs = list(takewhile(lambda x: x.created_time < before, logs))
+                    if logs:
+                        await OperaLogRollupService._rollup_batch(db, logs)
+                total += len(logs)
+                if len(logs) < settings.OPERA_LOG_ROLLUP_BATCH_SIZE:
+                    break
+                await lock.reacquire()
+            retention = settings.OPERA_LOG_ROLLUP_RETENTION_DAYS
+            async with async_db_session.begin() as db:
+                now = timezone.now()
+                for granularity, days in retention.items():
+                    await opera_log_rollup_dao.delete_before(
+                        db, granularity, now - timedelta(days=days)
+                    )
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                log.warning("Operation log rollup lock expired before release")
+        log.info(f"Rolled up {total} operation logs")
+        return total
+
+    @staticmethod
+    async def get_analytics(
+        *,
+        granularity: RollupGranularity,
+        start_time: datetime,
+        end_time: datetime,
+        group_by: Literal["path", "username", "method", "code", "bucket_time"],
+        path: str | None = None,
+        method: str | None = None,
+        username: str | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """
+        从汇总表统计请求数、错误率和耗时分位数，不读取原始日志
+
+        :param granularity:
+        :param start_time:
+        :param end_time:
+        :param group_by: bucket_time gives a time series in time order, other
+            groups are ordered by request count
+        :param path:
+        :param method:
+        :param username:
+        :param limit:
+        :return:
+        """
+        if end_time <= start_time:
+            raise errors.RequestError(msg="End time must be later than start time")
+        filters = {
+            "granularity": granularity.value,
+            "start_time": truncate(start_time, granularity),
+            "end_time": end_time,
+            "path": path,
+            "method": method,
+            "username": username,
+        }
+        async with async_db_session() as db:
+            groups = await opera_log_rollup_dao.get_groups(
+                db, group_by=group_by, limit=limit, **filters
+            )
+            if not groups:
+                return []
+            # Only the histograms of the returned groups are read
+            rows = await opera_log_rollup_dao.get_histograms(
+                db, group_by=group_by, keys=[group.key for group in groups], **filters
+            )
+        histograms = {group.key: OperaLogRollupService._histogram() for group in groups}
+        for row in rows:
+            histograms[row.key].merge(OperaLogRollupService._histogram(row.histogram))
+        result = []
+        for group in groups:
+            histogram = histograms[group.key]
+            # MySQL sums integers as DECIMAL
+            count, error_count = int(group.count), int(group.error_count)
+            result.append(
+                {
+                    group_by: group.key,
+                    "count": count,
+                    "error_count": error_count,
+                    "error_rate": error_count / count,
+                    "avg_cost": group.total_cost / count,
+                    "max_cost": group.max_cost,
+                    "p50_cost": histogram.quantile(0.5),
+                    "p90_cost": histogram.quantile(0.9),
+                    "p99_cost": histogram.quantile(0.99),
+                }
+            )
+        return result
+
+
+opera_log_rollup_service = OperaLogRollupService()
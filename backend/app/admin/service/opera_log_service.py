@@ -1,23 +1,76 @@
+from datetime import date, datetime
+from typing import Iterator
+
 from sqlalchemy import Select
 
 from backend.app.admin.crud.crud_opera_log import opera_log_dao
+from backend.app.admin.model import OperaLog
 from backend.app.admin.schema.opera_log import CreateOperaLogParam
+from backend.app.admin.service.log_archive_service import log_archive_service
+from backend.common.enums import MatchType
+from backend.common.exception import errors
+from backend.core.conf import settings
 from backend.database.db_mysql import async_db_session
+from backend.utils.batch_writer import BatchWriter
 
 
 class OperaLogService:
 
     @staticmethod
     async def get_select(
-        *, username: str | None = None, status: int | None = None, ip: str | None = None
+        *,
+        username: str | None = None,
+        status: int | None = None,
+        ip: str | None = None,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+        path: str | None = None,
+        method: str | None = None,
+        trace_id: str | None = None,
+        match_type: MatchType = MatchType.prefix,
     ) -> Select:
-        return await opera_log_dao.get_list(username=username, status=status, ip=ip)
+        return await opera_log_dao.get_list(
+            username=username,
+            status=status,
+            ip=ip,
+            start_time=start_time,
+            end_time=end_time,
+            path=path,
+            method=method,
+            trace_id=trace_id,
+            match_type=match_type,
+        )
+
+    @staticmethod
+    def get_archive(
+        *,
+        start_date: date,
+        end_date: date,
+        username: str | None = None,
+        status: int | None = None,
+        ip: str | None = None,
+    ) -> Iterator[bytes]:
+        if end_date < start_date:
+            raise errors.RequestError(msg="End date is earlier than start date")
+        return log_archive_service.read(
+            OperaLog.__tablename__,
+            start_date,
+            end_date,
+            username=username,
+            status=status,
+            ip=ip,
+        )
 
     @staticmethod
     async def create(*, obj_in: CreateOperaLogParam):
         async with async_db_session.begin() as db:
             await opera_log_dao.create(db, obj_in)
 
+    @staticmethod
+    async def bulk_create(*, obj_ins: list[CreateOperaLogParam]) -> None:
+        async with async_db_session.begin() as db:
+            await opera_log_dao.bulk_create(db, obj_ins)
+
     @staticmethod
     async def delete(*, pk: list[int]) -> int:
         async with async_db_session.begin() as db:
@@ -32,3 +85,12 @@ class OperaLogService:
 
 
 opera_log_service = OperaLogService()
+
+# Buffers logs of the operation log middleware, started and drained in the app lifespan
+opera_log_writer: BatchWriter[CreateOperaLogParam] = BatchWriter(
+    "opera_log",
+    lambda obj_ins: OperaLogService.bulk_create(obj_ins=obj_ins),
+    max_size=settings.OPERA_LOG_QUEUE_MAX_SIZE,
+    batch_size=settings.OPERA_LOG_BATCH_SIZE,
+    flush_interval_ms=settings.OPERA_LOG_FLUSH_INTERVAL_MS,
+)
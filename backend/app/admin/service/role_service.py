@@ -12,9 +12,10 @@ from backend.app.admin.schema.role import (
     UpdateRoleParam,
 )
 from backend.common.exception import errors
-from backend.core.conf import settings
+from backend.common.security.jwt import delete_user_cache
+from backend.common.security.rbac import rbac
 from backend.database.db_mysql import async_db_session
-from backend.database.db_redis import redis_client
+from backend.utils.tree_cache import tree_cache
 
 
 class RoleService:
@@ -52,6 +53,7 @@ class RoleService:
             if role:
                 raise errors.ForbiddenError(msg="Role already exists")
             await role_dao.create(db, obj)
+        await tree_cache.notify_change()
 
     @staticmethod
     async def update(*, pk: int, obj: UpdateRoleParam) -> int:
@@ -64,7 +66,8 @@ class RoleService:
                 if role:
                     raise errors.ForbiddenError(msg="Role already exists")
             count = await role_dao.update(db, pk, obj)
-            return count
+        await tree_cache.notify_change()
+        return count
 
     @staticmethod
     async def update_role_menu(
@@ -79,20 +82,18 @@ class RoleService:
                 if not menu:
                     raise errors.NotFoundError(msg="Menu does not exist")
             count = await role_dao.update_menus(db, pk, menu_ids)
-            if pk in [role.id for role in request.user.roles]:
-                await redis_client.delete_prefix(
-                    f"{settings.PERMISSION_REDIS_PREFIX}:{request.user.uuid}"
-                )
-                await redis_client.delete(
-                    f"{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}"
-                )
-            return count
+        await rbac.notify_role_menu_change()
+        await tree_cache.notify_change()
+        if pk in [role.id for role in request.user.roles]:
+            await delete_user_cache(request.user.id)
+        return count
 
     @staticmethod
     async def delete(*, pk: list[int]) -> int:
         async with async_db_session.begin() as db:
             count = await role_dao.delete(db, pk)
-            return count
+        await tree_cache.notify_change()
+        return count
 
 
 role_service = RoleService()
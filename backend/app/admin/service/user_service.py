@@ -17,6 +17,8 @@ from backend.app.admin.schema.user import (
 )
 from backend.common.exception import errors
 from backend.common.security.jwt import (
+    delete_all_token,
+    delete_user_cache,
     get_hash_password,
     get_token,
     password_verify,
@@ -24,7 +26,6 @@ from backend.common.security.jwt import (
 )
 from backend.core.conf import settings
 from backend.database.db_mysql import async_db_session
-from backend.database.db_redis import redis_client
 
 
 class UserService:
@@ -79,21 +80,18 @@ class UserService:
     async def pwd_reset(*, request: Request, obj: ResetPasswordParam) -> int:
         async with async_db_session.begin() as db:
             user = await user_dao.get(db, request.user.id)
-            if not password_verify(f"{obj.old_password}{user.salt}", user.password):
+            if not await password_verify(
+                f"{obj.old_password}{user.salt}", user.password
+            ):
                 raise errors.ForbiddenError(msg="Incorrect old password")
             np1 = obj.new_password
             np2 = obj.confirm_password
             if np1 != np2:
                 raise errors.ForbiddenError(msg="Passwords do not match")
-            new_pwd = get_hash_password(f"{obj.new_password}{user.salt}")
+            new_pwd = await get_hash_password(f"{obj.new_password}{user.salt}")
             count = await user_dao.reset_password(db, request.user.id, new_pwd)
-            key_prefix = [
-                f"{settings.TOKEN_REDIS_PREFIX}:{request.user.id}",
-                f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{request.user.id}",
-                f"{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}",
-            ]
-            for key in key_prefix:
-                await redis_client.delete_prefix(key)
+            await delete_all_token(request.user.id)
+            await delete_user_cache(request.user.id)
             return count
 
     @staticmethod
@@ -128,9 +126,7 @@ class UserService:
                 if email:
                     raise errors.ForbiddenError(msg="Email already registered")
             count = await user_dao.update_userinfo(db, input_user.id, obj)
-            await redis_client.delete(
-                f"{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}"
-            )
+            await delete_user_cache(input_user.id)
             return count
 
     @staticmethod
@@ -149,12 +145,7 @@ class UserService:
                 if not role:
                     raise errors.NotFoundError(msg="Role not found")
             await user_dao.update_role(db, input_user, obj)
-            await redis_client.delete_prefix(
-                f"{settings.PERMISSION_REDIS_PREFIX}:{request.user.uuid}"
-            )
-            await redis_client.delete(
-                f"{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}"
-            )
+            await delete_user_cache(input_user.id)
 
     @staticmethod
     async def update_avatar(
@@ -168,17 +159,33 @@ class UserService:
             if not input_user:
                 raise errors.NotFoundError(msg="User not found")
             count = await user_dao.update_avatar(db, input_user.id, avatar)
-            await redis_client.delete(
-                f"{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}"
-            )
+            await delete_user_cache(input_user.id)
             return count
 
     @staticmethod
     async def get_select(
-        *, dept: int, username: str = None, phone: str = None, status: int = None
+        *,
+        dept: int,
+        username: str = None,
+        phone: str = None,
+        status: int = None,
+        include_sub_dept: bool = False,
+        with_relations: bool = True,
     ) -> Select:
+        dept_path = None
+        if dept and include_sub_dept:
+            async with async_db_session() as db:
+                sub_dept = await dept_dao.get(db, dept)
+                # Paths not yet backfilled are empty and would match every dept
+                if sub_dept and sub_dept.path:
+                    dept_path = sub_dept.path
         return await user_dao.get_list(
-            dept=dept, username=username, phone=phone, status=status
+            dept=dept,
+            username=username,
+            phone=phone,
+            status=status,
+            dept_path=dept_path,
+            with_relations=with_relations,
         )
 
     @staticmethod
@@ -192,7 +199,7 @@ class UserService:
                     raise errors.ForbiddenError(msg="Illegal operation")
                 super_status = await user_dao.get_super(db, pk)
                 count = await user_dao.set_super(db, pk, not super_status)
-                await redis_client.delete(f"{settings.JWT_USER_REDIS_PREFIX}:{pk}")
+                await delete_user_cache(pk)
                 return count
 
     @staticmethod
@@ -208,7 +215,7 @@ class UserService:
                 count = await user_dao.set_staff(
                     db, pk, False if staff_status else True
                 )
-                await redis_client.delete(f"{settings.JWT_USER_REDIS_PREFIX}:{pk}")
+                await delete_user_cache(pk)
                 return count
 
     @staticmethod
@@ -222,7 +229,7 @@ class UserService:
                     raise errors.ForbiddenError(msg="Illegal operation")
                 status = await user_dao.get_status(db, pk)
                 count = await user_dao.set_status(db, pk, False if status else True)
-                await redis_client.delete(f"{settings.JWT_USER_REDIS_PREFIX}:{pk}")
+                await delete_user_cache(pk)
                 return count
 
     @staticmethod
@@ -241,37 +248,22 @@ class UserService:
                 count = await user_dao.set_multi_login(
                     db, pk, False if multi_login else True
                 )
-                await redis_client.delete(
-                    f"{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}"
-                )
+                await delete_user_cache(pk)
                 token = get_token(request)
                 latest_multi_login = await user_dao.get_multi_login(db, pk)
-                if pk == user_id:
-                    if not latest_multi_login:
-                        key_prefix = f"{settings.TOKEN_REDIS_PREFIX}:{pk}"
-                        await redis_client.delete_prefix(
-                            key_prefix, exclude=f"{key_prefix}:{token}"
-                        )
-                        refresh_token = request.cookies.get(
-                            settings.COOKIE_REFRESH_TOKEN_KEY
-                        )
-                        if refresh_token:
-                            key_prefix = f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{pk}"
-                            await redis_client.delete_prefix(
-                                key_prefix, exclude=f"{key_prefix}:{refresh_token}"
-                            )
-                else:
-                    if not latest_multi_login:
-                        key_prefix = [f"{settings.TOKEN_REDIS_PREFIX}:{pk}"]
-                        refresh_token = request.cookies.get(
-                            settings.COOKIE_REFRESH_TOKEN_KEY
+                if not latest_multi_login:
+                    refresh_token = request.cookies.get(
+                        settings.COOKIE_REFRESH_TOKEN_KEY
+                    )
+                    if pk == user_id:
+                        await delete_all_token(
+                            pk,
+                            refresh=bool(refresh_token),
+                            exclude_token=token,
+                            exclude_refresh_token=refresh_token,
                         )
-                        if refresh_token:
-                            key_prefix.append(
-                                f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{pk}"
-                            )
-                        for key in key_prefix:
-                            await redis_client.delete_prefix(key)
+                    else:
+                        await delete_all_token(pk, refresh=bool(refresh_token))
                 return count
 
     @staticmethod
@@ -281,12 +273,8 @@ class UserService:
             if not input_user:
                 raise errors.NotFoundError(msg="User not found")
             count = await user_dao.delete(db, input_user.id)
-            key_prefix = [
-                f"{settings.TOKEN_REDIS_PREFIX}:{input_user.id}",
-                f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{input_user.id}",
-            ]
-            for key in key_prefix:
-                await redis_client.delete_prefix(key)
+            await delete_all_token(input_user.id)
+            await delete_user_cache(input_user.id)
             return count
 
 
@@ -0,0 +1,70 @@
+import random
+
+import casbin
+import pytest
+
+from backend.common.security.casbin_index import CasbinPolicyIndex
+from backend.common.security.rbac import _CASBIN_RBAC_MODEL_CONF_TEXT
+
+SUBJECTS = ["u0", "u1", "u2", "u3", "r0", "r1", "r2", "r3"]
+ROLES = SUBJECTS[4:]
+ACTIONS = ["GET", "POST", "*"]
+POLICY_SEGMENTS = ["api", "v1", "sys", "users", "user", "1", "{id}", "{pk}", "a.b", ""]
+PATH_SEGMENTS = [
+    "api",
+    "v1",
+    "sys",
+    "users",
+    "user",
+    "1",
+    "22",
+    "a.b",
+    "axb",
+    "",
+    "{id}",
+]
+
+
+def random_policy_path(r: random.Random) -> str:
+    path = "/" + "/".join(r.choice(POLICY_SEGMENTS) for _ in range(r.randint(0, 4)))
+    choice = r.random()
+    if choice < 0.2:
+        path += "/*"
+    elif choice < 0.3:
+        path += "*"
+    elif choice < 0.4:
+        i = r.randint(0, len(path))
+        path = f"{path[:i]}*{path[i:]}"
+    return path
+
+
+def random_request_path(r: random.Random) -> str:
+    path = "/" + "/".join(r.choice(PATH_SEGMENTS) for _ in range(r.randint(0, 5)))
+    if r.random() < 0.1:
+        path = f"{path.rstrip('/')}/"
+    return path
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_policy_index_parity(seed: int) -> None:
+    r = random.Random(seed)
+    enforcer = casbin.Enforcer(
+        casbin.Enforcer.new_model(text=_CASBIN_RBAC_MODEL_CONF_TEXT)
+    )
+    for _ in range(r.randint(1, 40)):
+        path = random_policy_path(r)
+        enforcer.add_policy(r.choice(SUBJECTS), path, r.choice(ACTIONS))
+    for _ in range(r.randint(0, 8)):
+        enforcer.add_grouping_policy(r.choice(SUBJECTS), r.choice(ROLES))
+    index = CasbinPolicyIndex(enforcer.get_policy(), enforcer.get_grouping_policy())
+
+    for _ in range(200):
+        sub = r.choice(SUBJECTS)
+        path = random_request_path(r)
+        method = r.choice(["GET", "POST", "PUT"])
+        try:
+            expected = enforcer.enforce(sub, path, method)
+        except Exception:
+            # Patterns such as `*/` are not valid regexes for keyMatch3
+            continue
+        assert index.enforce(sub, path, method) == expected, (sub, path, method)
@@ -0,0 +1,78 @@
+import random
+
+from datetime import datetime
+
+import pytest
+
+from backend.app.admin.service.opera_log_rollup_service import truncate
+from backend.common.enums import RollupGranularity
+from backend.utils.histogram import LogHistogram
+
+ACCURACY = 0.01
+QUANTILES = [0.0, 0.1, 0.5, 0.9, 0.99, 1.0]
+
+
+def exact_quantile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+def random_costs(r: random.Random) -> list[float]:
+    return [r.lognormvariate(-3, 1.5) for _ in range(r.randint(1, 2000))]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_histogram_quantile_accuracy(seed: int) -> None:
+    r = random.Random(seed)
+    values = random_costs(r)
+    histogram = LogHistogram(relative_accuracy=ACCURACY)
+    for value in values:
+        histogram.add(value)
+
+    assert histogram.count == len(values)
+    for q in QUANTILES:
+        expected = exact_quantile(values, q)
+        assert abs(histogram.quantile(q) - expected) <= ACCURACY * expected, q
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_histogram_merge(seed: int) -> None:
+    r = random.Random(seed)
+    parts = [random_costs(r) for _ in range(r.randint(2, 5))]
+    merged = LogHistogram(relative_accuracy=ACCURACY)
+    for part in parts:
+        histogram = LogHistogram(relative_accuracy=ACCURACY)
+        for value in part:
+            histogram.add(value)
+        # Rollups store the buckets as JSON
+        merged.merge(LogHistogram.from_dict(histogram.to_dict(), ACCURACY))
+    whole = LogHistogram(relative_accuracy=ACCURACY)
+    for value in sum(parts, []):
+        whole.add(value)
+
+    assert merged.to_dict() == whole.to_dict()
+    for q in QUANTILES:
+        assert merged.quantile(q) == whole.quantile(q)
+
+
+def test_histogram_empty_and_zero() -> None:
+    histogram = LogHistogram(relative_accuracy=ACCURACY)
+    assert histogram.quantile(0.5) is None
+
+    histogram.add(0.0, count=3)
+    assert histogram.count == 3
+    assert histogram.quantile(0.5) <= LogHistogram.min_value * (1 + ACCURACY)
+
+
+@pytest.mark.parametrize(
+    "granularity, expected",
+    [
+        (RollupGranularity.minute, datetime(2024, 5, 17, 13, 42)),
+        (RollupGranularity.hour, datetime(2024, 5, 17, 13)),
+        (RollupGranularity.day, datetime(2024, 5, 17)),
+    ],
+)
+def test_truncate(granularity: RollupGranularity, expected: datetime) -> None:
+    dt = datetime(2024, 5, 17, 13, 42, 59, 999999)
+    assert truncate(dt, granularity) == expected
+    assert truncate(expected, granularity) == expected
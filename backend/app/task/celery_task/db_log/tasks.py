@@ -1,9 +1,16 @@
 from sqlalchemy.exc import SQLAlchemyError
 
-from backend.app.admin.service.login_log_service import login_log_service
-from backend.app.admin.service.opera_log_service import opera_log_service
+from backend.app.admin.crud.crud_login_log import login_log_dao
+from backend.app.admin.crud.crud_opera_log import opera_log_dao
+from backend.app.admin.model import LoginLog, OperaLog
+from backend.app.admin.service.log_partition_service import log_partition_service
+from backend.app.admin.service.log_retention_service import log_retention_service
+from backend.app.admin.service.opera_log_rollup_service import (
+    opera_log_rollup_service,
+)
 from backend.app.task.celery import celery_app
 from backend.app.task.conf import task_settings
+from backend.core.conf import settings
 
 
 @celery_app.task(
@@ -12,10 +19,18 @@ from backend.app.task.conf import task_settings
     retry_backoff=True,
     max_retries=task_settings.CELERY_TASK_MAX_RETRIES,
 )
-async def auto_delete_db_opera_log(self) -> int:
-    """Automatically delete database operation logs"""
+async def auto_delete_db_opera_log(self, dry_run: bool = False) -> int:
+    """Automatically delete expired database operation logs"""
     try:
-        result = await opera_log_service.delete_all()
+        result = await log_retention_service.delete_expired(
+            opera_log_dao,
+            retention_days=settings.OPERA_LOG_RETENTION_DAYS,
+            dry_run=dry_run,
+            archive=settings.OPERA_LOG_ARCHIVE_ENABLED,
+            progress=lambda total, last_id: self.update_state(
+                state="PROGRESS", meta={"total": total, "last_id": last_id}
+            ),
+        )
     except SQLAlchemyError as exc:
         raise self.retry(exc=exc)
     return result
@@ -27,11 +42,62 @@ async def auto_delete_db_opera_log(self) -> int:
     retry_backoff=True,
     max_retries=task_settings.CELERY_TASK_MAX_RETRIES,
 )
-async def auto_delete_db_login_log(self) -> int:
-    """Automatically delete database login logs"""
+async def auto_delete_db_login_log(self, dry_run: bool = False) -> int:
+    """Automatically delete expired database login logs"""
+
+    try:
+        result = await log_retention_service.delete_expired(
+            login_log_dao,
+            retention_days=settings.LOGIN_LOG_RETENTION_DAYS,
+            dry_run=dry_run,
+            progress=lambda total, last_id: self.update_state(
+                state="PROGRESS", meta={"total": total, "last_id": last_id}
+            ),
+        )
+    except SQLAlchemyError as exc:
+        raise self.retry(exc=exc)
+    return result
 
+
+@celery_app.task(
+    name="manage_db_log_partitions",
+    bind=True,
+    retry_backoff=True,
+    max_retries=task_settings.CELERY_TASK_MAX_RETRIES,
+)
+async def manage_db_log_partitions(self) -> dict[str, dict[str, list[str]]]:
+    """Pre-create future partitions and drop expired partitions of database logs"""
+    try:
+        if settings.LOG_PARTITION_ENABLED and settings.OPERA_LOG_ARCHIVE_ENABLED:
+            # Archive expired operation logs so that no partition is dropped unarchived
+            await log_retention_service.delete_expired(
+                opera_log_dao,
+                retention_days=settings.OPERA_LOG_RETENTION_DAYS,
+                archive=True,
+            )
+        result = {
+            OperaLog.__tablename__: await log_partition_service.maintain(
+                OperaLog, retention_days=settings.OPERA_LOG_RETENTION_DAYS
+            ),
+            LoginLog.__tablename__: await log_partition_service.maintain(
+                LoginLog, retention_days=settings.LOGIN_LOG_RETENTION_DAYS
+            ),
+        }
+    except SQLAlchemyError as exc:
+        raise self.retry(exc=exc)
+    return result
+
+
+@celery_app.task(
+    name="rollup_db_opera_log",
+    bind=True,
+    retry_backoff=True,
+    max_retries=task_settings.CELERY_TASK_MAX_RETRIES,
+)
+async def rollup_db_opera_log(self) -> int:
+    """Roll up new database operation logs into the analytics rollups"""
     try:
-        result = await login_log_service.delete_all()
+        result = await opera_log_rollup_service.rollup()
     except SQLAlchemyError as exc:
         raise self.retry(exc=exc)
     return result
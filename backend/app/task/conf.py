@@ -51,6 +51,14 @@ class TaskSettings(BaseSettings):
             "task": "auto_delete_db_login_log",
             "schedule": crontab(0, 0, day_of_month="15"),
         },
+        "exec-every-minute": {
+            "task": "rollup_db_opera_log",
+            "schedule": 60,
+        },
+        "exec-every-day": {
+            "task": "manage_db_log_partitions",
+            "schedule": crontab(30, 0),
+        },
     }
 
     @model_validator(mode="before")
@@ -2,8 +2,6 @@ import dataclasses
 
 from datetime import datetime
 
-from fastapi import Response
-
 from backend.common.enums import StatusType
 
 
@@ -29,7 +27,6 @@ class RequestCallNext:
     msg: str
     status: StatusType
     err: Exception | None
-    response: Response
 
 
 @dataclasses.dataclass
@@ -50,3 +47,9 @@ class AccessToken:
 class RefreshToken:
     refresh_token: str
     refresh_token_expire_time: datetime
+
+
+@dataclasses.dataclass
+class SerializedData:
+    content: bytes
+    etag: str
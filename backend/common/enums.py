@@ -58,6 +58,29 @@ class OperaLogCipherType(IntEnum):
     itsdangerous = 2
     plan = 3
 
+class PageCountType(StrEnum):
+    """Strategies for counting paginated rows."""
+    exact = 'exact'
+    cached = 'cached'
+    estimate = 'estimate'
+
+class MatchType(StrEnum):
+    """Match modes of text filters."""
+    exact = 'exact'
+    prefix = 'prefix'
+    contains = 'contains'
+
+class RollupGranularity(StrEnum):
+    """Bucket sizes of log rollups."""
+    minute = 'minute'
+    hour = 'hour'
+    day = 'day'
+
+class ExportFormat(StrEnum):
+    """File formats of list exports."""
+    csv = 'csv'
+    ndjson = 'ndjson'
+
 class StatusType(IntEnum):
     """General status types."""
     disable = 0
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import csv
+import io
+import zlib
+
+from typing import TYPE_CHECKING, AsyncIterator
+
+import msgspec
+
+from pydantic import BaseModel
+from starlette.responses import StreamingResponse
+
+from backend.common.enums import ExportFormat
+from backend.core.conf import settings
+from backend.database.db_mysql import async_db_session
+from backend.utils.timezone import timezone
+
+if TYPE_CHECKING:
+    from sqlalchemy import Select
+
+_encoder = msgspec.json.Encoder()
+
+_media_types = {
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.ndjson: "application/x-ndjson",
+}
+
+
+async def _iter_rows(
+    select: Select, schema: type[BaseModel]
+) -> AsyncIterator[list[dict]]:
+    """
+    Fetch rows through a server side cursor, EXPORT_FETCH_SIZE rows at a time
+
+    The request session is closed before a streaming response is sent, so the
+    rows are read in a session of their own
+
+    :param select:
+    :param schema:
+    :return:
+    """
+    async with async_db_session() as db:
+        result = await db.stream_scalars(
+            select.execution_options(yield_per=settings.EXPORT_FETCH_SIZE)
+        )
+        async for partition in result.partitions():
+            yield [
+                schema.model_validate(row).model_dump(mode="json") for row in partition
+            ]
+
+
+def _encode_csv(rows: list[dict], fields: list[str]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        values = (row[field] for field in fields)
+        writer.writerow(
+            _encoder.encode(v).decode() if isinstance(v, (dict, list)) else v
+            for v in values
+        )
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(rows: list[dict]) -> bytes:
+    return b"".join(_encoder.encode(row) + b"\n" for row in rows)
+
+
+async def _iter_export(
+    select: Select, schema: type[BaseModel], export_format: ExportFormat, compress: bool
+) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    fields = list(schema.model_fields)
+    chunk = b""
+    if export_format == ExportFormat.csv:
+        # BOM so that spreadsheet software detects utf-8
+        chunk = ",".join(fields).encode("utf-8-sig") + b"\r\n"
+    async for rows in _iter_rows(select, schema):
+        if export_format == ExportFormat.csv:
+            chunk += _encode_csv(rows, fields)
+        else:
+            chunk += _encode_ndjson(rows)
+        if compressor:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+        chunk = b""
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def export_data(
+    select: Select,
+    schema: type[BaseModel],
+    export_format: ExportFormat,
+    filename: str,
+    *,
+    compress: bool = False,
+) -> StreamingResponse:
+    """
+    以流式响应导出 select 的全部数据，内存占用与数据量无关
+
+    :param select:
+    :param schema: row schema, its fields are the csv columns
+    :param export_format:
+    :param filename: file name without time and extension
+    :param compress: gzip the file
+    :return:
+    """
+    filename = f"{filename}_{timezone.now():%Y%m%d%H%M%S}.{export_format.value}"
+    if compress:
+        filename += ".gz"
+    return StreamingResponse(
+        _iter_export(select, schema, export_format, compress),
+        media_type="application/gzip" if compress else _media_types[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
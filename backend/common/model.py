@@ -26,6 +26,12 @@ id_key = Annotated[
     ),
 ]
 
+# Monthly RANGE partitions of the log tables when LOG_PARTITION_ENABLED, new tables start
+# with p_future only, month partitions are split off it by the log partition task
+log_partition_by = (
+    "RANGE COLUMNS(created_time) (PARTITION p_future VALUES LESS THAN (MAXVALUE))"
+)
+
 
 # Mixin: A concept in object-oriented programming that makes the structure clearer, `Wiki <https://en.wikipedia.org/wiki/Mixin/>`__
 class UserMixin(MappedAsDataclass):
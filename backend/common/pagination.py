@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import json
 import math
 
-from typing import TYPE_CHECKING, Dict, Generic, Sequence, TypeVar
+from datetime import datetime
+from typing import TYPE_CHECKING, Annotated, Dict, Generic, Sequence, TypeVar
 
 from fastapi import Depends, Query
 from fastapi_pagination import pagination_ctx
@@ -10,6 +14,12 @@ from fastapi_pagination.bases import AbstractPage, AbstractParams, RawParams
 from fastapi_pagination.ext.sqlalchemy import paginate
 from fastapi_pagination.links.bases import create_links
 from pydantic import BaseModel
+from sqlalchemy import Table, and_, func, literal, or_, select as sa_select, text
+
+from backend.common.enums import PageCountType
+from backend.common.exception import errors
+from backend.core.conf import settings
+from backend.database.db_redis import redis_client
 
 if TYPE_CHECKING:
     from sqlalchemy import Select
@@ -80,8 +90,52 @@ class _PageData(BaseModel, Generic[DataT]):
     page_data: DataT | None = None
 
 
+async def count_cached(db: AsyncSession, select: Select) -> int:
+    """
+    统计总数，按查询语句及其参数在 Redis 中缓存
+
+    :param db:
+    :param select:
+    :return:
+    """
+    count_stmt = sa_select(func.count()).select_from(select.order_by(None).subquery())
+    compiled = count_stmt.compile(dialect=db.bind.dialect)
+    params = sorted((key, repr(value)) for key, value in compiled.params.items())
+    digest = hashlib.sha1(f"{compiled}{params}".encode()).hexdigest()
+    key = f"{settings.PAGINATION_COUNT_REDIS_PREFIX}:{digest}"
+    total = await redis_client.get(key)
+    if total is not None:
+        return int(total)
+    total = await db.scalar(count_stmt)
+    await redis_client.setex(key, settings.PAGINATION_COUNT_EXPIRE_SECONDS, total)
+    return total
+
+
+async def count_estimate(db: AsyncSession, select: Select) -> int | None:
+    """
+    从 information_schema 估算总数，仅适用于单表无过滤条件的 MySQL 查询
+
+    :param db:
+    :param select:
+    :return: None if the select can not be estimated
+    """
+    if select.whereclause is not None or db.bind.dialect.name != "mysql":
+        return None
+    froms = select.get_final_froms()
+    if len(froms) != 1 or not isinstance(froms[0], Table):
+        return None
+    stmt = text(
+        "SELECT TABLE_ROWS FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+    )
+    return await db.scalar(stmt, {"table_name": froms[0].name})
+
+
 async def paging_data(
-    db: AsyncSession, select: Select, page_data_schema: SchemaT
+    db: AsyncSession,
+    select: Select,
+    page_data_schema: SchemaT,
+    count_type: PageCountType = PageCountType.exact,
 ) -> dict:
     """
     基于 SQLAlchemy 创建分页数据
@@ -89,14 +143,112 @@ async def paging_data(
     :param db:
     :param select:
     :param page_data_schema:
+    :param count_type: exact counts on every request, cached reuses the count
+        of the same query for `PAGINATION_COUNT_EXPIRE_SECONDS`, estimate reads
+        the InnoDB row estimate and falls back to cached when it can not be used
     :return:
     """
-    _paginate = await paginate(db, select)
+    count_query = None
+    if count_type != PageCountType.exact:
+        total = None
+        if count_type == PageCountType.estimate:
+            total = await count_estimate(db, select)
+        if total is None:
+            total = await count_cached(db, select)
+        # The known total is handed to paginate as a constant query
+        count_query = sa_select(literal(total))
+    _paginate = await paginate(db, select, count_query=count_query)
     page_data = _PageData[_Page[page_data_schema]](page_data=_paginate).model_dump()[
         "page_data"
     ]
     return page_data
 
 
+class _CursorParams(BaseModel):
+    cursor: str | None = Query(None, description="Cursor of the page")
+    size: int = Query(20, gt=0, le=100, description="Page size")
+    with_total: bool = Query(False, description="Count all rows, slow on big tables")
+
+
+class _CursorPage(BaseModel, Generic[T]):
+    items: Sequence[T]  # 数据
+    size: int  # 每页数量
+    next_cursor: str | None  # 下一页游标，为空表示没有下一页
+    total: int | None  # 总数据数，仅在请求时统计
+
+
+def encode_cursor(created_time: datetime, pk: int) -> str:
+    """
+    编码游标
+
+    :param created_time:
+    :param pk:
+    :return:
+    """
+    raw = json.dumps([created_time.isoformat(), pk], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    解码游标
+
+    :param cursor:
+    :return:
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_time, pk = json.loads(raw)
+        return datetime.fromisoformat(created_time), int(pk)
+    except Exception:
+        raise errors.RequestError(msg="Invalid cursor")
+
+
+async def cursor_paging_data(
+    db: AsyncSession, select: Select, page_data_schema: SchemaT, params: _CursorParams
+) -> dict:
+    """
+    基于 (created_time, id) 的游标分页，翻页开销与页码无关
+
+    The select must query a model with `created_time` and `id` columns, its
+    ordering is replaced by created_time desc, id desc
+
+    :param db:
+    :param select:
+    :param page_data_schema:
+    :param params:
+    :return:
+    """
+    model = select.column_descriptions[0]["entity"]
+    total = None
+    if params.with_total:
+        count_stmt = sa_select(func.count()).select_from(
+            select.order_by(None).subquery()
+        )
+        total = await db.scalar(count_stmt)
+    stmt = select.order_by(None).order_by(model.created_time.desc(), model.id.desc())
+    if params.cursor:
+        created_time, pk = decode_cursor(params.cursor)
+        # Expanded row comparison, MySQL does not use an index range for tuples
+        stmt = stmt.where(
+            or_(
+                model.created_time < created_time,
+                and_(model.created_time == created_time, model.id < pk),
+            )
+        )
+    result = await db.execute(stmt.limit(params.size + 1))
+    rows = result.scalars().all()
+    next_cursor = None
+    if len(rows) > params.size:
+        rows = rows[: params.size]
+        next_cursor = encode_cursor(rows[-1].created_time, rows[-1].id)
+    page = _CursorPage[page_data_schema](
+        items=rows, size=params.size, next_cursor=next_cursor, total=total
+    )
+    return page.model_dump()
+
+
 # 分页依赖注入
 DependsPagination = Depends(pagination_ctx(_Page))
+# 游标分页参数
+CursorPagination = Annotated[_CursorParams, Depends(_CursorParams)]
@@ -0,0 +1,212 @@
+import re
+
+from collections import deque
+from typing import Iterable, Sequence
+
+from casbin.util import key_match, key_match3
+
+# `{name}` placeholder of keyMatch3, it matches one non-empty path segment
+_PLACEHOLDER_PATTERN = re.compile(r"\{[^/{}]+\}")
+# Same substitution as casbin keyMatch3
+_KEY_MATCH3_PATTERN = re.compile(r"(.*?){[^\/]+?}(.*?)")
+_REGEX_METACHARS = frozenset(".^$*+?()[]{}|\\")
+# Same as the default casbin role manager
+_MAX_HIERARCHY_LEVEL = 10
+
+
+class _Node:
+    """Path segment trie node"""
+
+    __slots__ = ("children", "param", "exact", "tail", "prefixes")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        # Child for a `{name}` segment
+        self.param: _Node | None = None
+        # Path ends here
+        self.exact: bool = False
+        # keyMatch3 `/*`: any remainder, as long as a further segment exists
+        self.tail: bool = False
+        # keyMatch `*`: the next segment starts with one of these
+        self.prefixes: set[str] = set()
+
+    def literal(self, segment: str) -> "_Node":
+        node = self.children.get(segment)
+        if node is None:
+            node = self.children[segment] = _Node()
+        return node
+
+    def placeholder(self) -> "_Node":
+        if self.param is None:
+            self.param = _Node()
+        return self.param
+
+    def match(self, segments: Sequence[str], index: int) -> bool:
+        if index == len(segments):
+            return self.exact
+        if self.tail:
+            return True
+        segment = segments[index]
+        for prefix in self.prefixes:
+            if segment.startswith(prefix):
+                return True
+        child = self.children.get(segment)
+        if child is not None and child.match(segments, index + 1):
+            return True
+        if self.param is not None and segment:
+            return self.param.match(segments, index + 1)
+        return False
+
+
+class CasbinPolicyIndex:
+    """
+    Compiled casbin policies for the RBAC model used by `RBAC.enforcer`
+
+    Matcher: g(r.sub, p.sub) && (keyMatch(r.obj, p.obj) || keyMatch3(r.obj, p.obj))
+    && (r.act == p.act || p.act == "*")
+
+    Policies are stored in a path segment trie per (subject, action), so a check
+    costs about O(roles * path depth) instead of O(policies). keyMatch3 patterns
+    that can not be expressed as segments (regex characters, inner `*`) are
+    kept as compiled regexes and checked after the trie
+    """
+
+    def __init__(
+        self, policies: Iterable[Sequence[str]], groups: Iterable[Sequence[str]]
+    ):
+        self._tries: dict[tuple[str, str], _Node] = {}
+        self._fallback: dict[tuple[str, str], list[re.Pattern]] = {}
+        self._policies: dict[tuple[str, str], list[str]] = {}
+        self._groups: dict[str, set[str]] = {}
+        for sub, obj, act, *_ in policies:
+            self._add_policy(sub, obj, act)
+        for user, role, *_ in groups:
+            self._groups.setdefault(user, set()).add(role)
+
+    def _add_policy(self, sub: str, obj: str, act: str) -> None:
+        key = (sub, act)
+        self._policies.setdefault(key, []).append(obj)
+        root = self._tries.get(key)
+        if root is None:
+            root = self._tries[key] = _Node()
+        # keyMatch: exact path, or a plain prefix up to the first `*`
+        star = obj.find("*")
+        if star == -1:
+            self._walk_literal(root, obj.split("/")).exact = True
+        else:
+            *segments, partial = obj[:star].split("/")
+            self._walk_literal(root, segments).prefixes.add(partial)
+        # keyMatch3
+        compiled = self._compile_key_match3(obj)
+        if compiled is None:
+            regex = self._compile_regex(obj)
+            if regex is not None:
+                self._fallback.setdefault(key, []).append(regex)
+            return
+        segments, tail = compiled
+        node = root
+        for segment in segments:
+            node = node.placeholder() if segment is None else node.literal(segment)
+        if tail:
+            node.tail = True
+        else:
+            node.exact = True
+
+    @staticmethod
+    def _walk_literal(node: _Node, segments: Iterable[str]) -> _Node:
+        for segment in segments:
+            node = node.literal(segment)
+        return node
+
+    @staticmethod
+    def _compile_key_match3(obj: str) -> tuple[list[str | None], bool] | None:
+        """
+        Split a keyMatch3 pattern into segments, None stands for a placeholder
+
+        :param obj:
+        :return: None if the pattern needs a real regex
+        """
+        tail = obj.endswith("/*")
+        if tail:
+            obj = obj[:-2]
+        segments = []
+        for segment in obj.split("/"):
+            if _PLACEHOLDER_PATTERN.fullmatch(segment):
+                segments.append(None)
+            elif _REGEX_METACHARS.intersection(segment):
+                return None
+            else:
+                segments.append(segment)
+        return segments, tail
+
+    @staticmethod
+    def _compile_regex(obj: str) -> re.Pattern | None:
+        """
+        Compile a keyMatch3 pattern as casbin does
+
+        :param obj:
+        :return: None if it is not a valid regex, such a pattern never matches
+        """
+        pattern = obj.replace("/*", "/.*")
+        pattern = _KEY_MATCH3_PATTERN.sub(r"\g<1>[^\/]+\g<2>", pattern)
+        try:
+            return re.compile(f"^{pattern}$")
+        except re.error:
+            return None
+
+    def get_subjects(self, sub: str) -> set[str]:
+        """
+        Get the subject and every role it inherits
+
+        :param sub:
+        :return:
+        """
+        subjects = {sub}
+        queue = deque([(sub, 0)])
+        while queue:
+            name, level = queue.popleft()
+            if level >= _MAX_HIERARCHY_LEVEL:
+                continue
+            for role in self._groups.get(name, ()):
+                if role not in subjects:
+                    subjects.add(role)
+                    queue.append((role, level + 1))
+        return subjects
+
+    def enforce(self, sub: str, obj: str, act: str) -> bool:
+        """
+        Decide whether sub can act on obj
+
+        :param sub:
+        :param obj:
+        :param act:
+        :return:
+        """
+        subjects = self.get_subjects(sub)
+        # Regex `.` and `$` treat newlines specially, leave such paths to casbin
+        if "\n" in obj:
+            return self._enforce_linear(subjects, obj, act)
+        keys = [(subject, action) for subject in subjects for action in (act, "*")]
+        segments = obj.split("/")
+        for key in keys:
+            root = self._tries.get(key)
+            if root is not None and root.match(segments, 0):
+                return True
+        for key in keys:
+            for regex in self._fallback.get(key, ()):
+                if regex.match(obj):
+                    return True
+        return False
+
+    def _enforce_linear(self, subjects: set[str], obj: str, act: str) -> bool:
+        for subject in subjects:
+            for action in (act, "*"):
+                for pattern in self._policies.get((subject, action), ()):
+                    if key_match(obj, pattern):
+                        return True
+                    try:
+                        if key_match3(obj, pattern):
+                            return True
+                    except re.error:
+                        continue
+        return False
@@ -1,4 +1,9 @@
-from datetime import timedelta
+import asyncio
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable
 
 from fastapi import Depends, Request
 from fastapi.security import HTTPBearer
@@ -8,30 +13,79 @@ from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.admin.model import User
+from backend.app.admin.schema.user import CurrentUserIns
 from backend.common.dataclasses import AccessToken, NewToken, RefreshToken
 from backend.common.exception.errors import AuthorizationError, TokenError
 from backend.core.conf import settings
 from backend.database.db_redis import redis_client
+from backend.utils.local_cache import LocalCache
+from backend.utils.metrics import metrics
+from backend.utils.redis_pubsub import redis_pubsub
 from backend.utils.timezone import timezone
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=settings.PASSWORD_HASH_SCHEMES,
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    argon2__type="ID",
+    argon2__time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+    argon2__memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+)
+
+# bcrypt releases the GIL, hashing in a bounded thread pool keeps the event loop
+# free for other requests and lets logins use every core
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_MAX_WORKERS, thread_name_prefix="password"
+)
+_password_pending: int = 0
+metrics.register_gauge("password_hash_pending", lambda: _password_pending)
+
+# Validated users of this worker, the TTL bounds staleness of unpublished changes
+user_cache: LocalCache[int, CurrentUserIns] = LocalCache(
+    settings.JWT_USER_LOCAL_CACHE_SIZE, settings.JWT_USER_LOCAL_CACHE_EXPIRE_SECONDS
+)
+metrics.register_gauge("jwt_user_local_cache_size", lambda: len(user_cache))
+metrics.register_gauge(
+    "jwt_user_local_cache_hit_ratio",
+    lambda: round(user_cache.hits / max(user_cache.hits + user_cache.misses, 1), 4),
+)
 
 
 # JWT authorizes dependency injection
 DependsJwtAuth = Depends(HTTPBearer())
 
 
-def get_hash_password(password: str) -> str:
+async def _run_password_task(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a password hash function in the password thread pool
+
+    :param func:
+    :param args:
+    :return:
+    """
+    global _password_pending
+    _password_pending += 1
+    start_time = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_pending -= 1
+        metrics.observe("password_hash", time.perf_counter() - start_time)
+
+
+async def get_hash_password(password: str) -> str:
     """
     Encrypt passwords using the hash algorithm
 
     :param password:
     :return:
     """
-    return pwd_context.hash(password)
+    return await _run_password_task(pwd_context.hash, password)
 
 
-def password_verify(plain_password: str, hashed_password: str) -> bool:
+async def password_verify(plain_password: str, hashed_password: str) -> bool:
     """
     Password verification
 
@@ -39,7 +93,112 @@ def password_verify(plain_password: str, hashed_password: str) -> bool:
     :param hashed_password: The hash ciphers to compare
     :return:
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await _run_password_task(pwd_context.verify, plain_password, hashed_password)
+
+
+async def password_verify_and_update(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Password verification, returns a new hash when the stored one uses a
+    deprecated scheme or other costs than configured
+
+    :param plain_password: The password to verify
+    :param hashed_password: The hash ciphers to compare
+    :return:
+    """
+    return await _run_password_task(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+def token_alive(expire_time: str | None) -> bool:
+    """
+    Check the expire timestamp stored for a token
+
+    :param expire_time:
+    :return:
+    """
+    return expire_time is not None and int(expire_time) > timezone.now().timestamp()
+
+
+async def store_token(
+    key: str, token: str, expire: datetime, expire_seconds: int, multi_login: bool
+) -> None:
+    """
+    Store token in the per-user token hash, field is the token and value is
+    the expire timestamp
+
+    :param key: The per-user token hash key
+    :param token:
+    :param expire:
+    :param expire_seconds:
+    :param multi_login: Keep other sessions of the user
+    :return:
+    """
+    if multi_login:
+        # Expired tokens are pruned lazily when the user logs in again
+        tokens = await redis_client.hgetall(key)
+        expired = [field for field, value in tokens.items() if not token_alive(value)]
+    else:
+        expired = []
+    async with redis_client.pipeline(transaction=True) as pipe:
+        if not multi_login:
+            pipe.delete(key)
+        elif expired:
+            pipe.hdel(key, *expired)
+        pipe.hset(key, token, int(expire.timestamp()))
+        # Every token has the same lifetime, so the latest one outlives the others
+        pipe.expire(key, expire_seconds)
+        await pipe.execute()
+
+
+async def delete_token(
+    user_id: int, token: str | None = None, refresh_token: str | None = None
+) -> None:
+    """
+    Revoke tokens of a session
+
+    :param user_id:
+    :param token:
+    :param refresh_token:
+    :return:
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        if token:
+            pipe.hdel(f"{settings.TOKEN_REDIS_PREFIX}:{user_id}", token)
+        if refresh_token:
+            pipe.hdel(f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{user_id}", refresh_token)
+        await pipe.execute()
+
+
+async def delete_all_token(
+    user_id: int,
+    *,
+    refresh: bool = True,
+    exclude_token: str | None = None,
+    exclude_refresh_token: str | None = None,
+) -> None:
+    """
+    Revoke every session of a user, cost is O(sessions of the user)
+
+    :param user_id:
+    :param refresh: Also revoke refresh tokens
+    :param exclude_token: Access token to keep
+    :param exclude_refresh_token: Refresh token to keep
+    :return:
+    """
+    keys = {f"{settings.TOKEN_REDIS_PREFIX}:{user_id}": exclude_token}
+    if refresh:
+        keys[f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{user_id}"] = exclude_refresh_token
+    for key, exclude in keys.items():
+        if exclude is None:
+            await redis_client.delete(key)
+            continue
+        tokens = await redis_client.hkeys(key)
+        revoked = [token for token in tokens if token != exclude]
+        if revoked:
+            await redis_client.hdel(key, *revoked)
 
 
 async def create_access_token(sub: str, multi_login: bool) -> AccessToken:
@@ -58,12 +217,8 @@ async def create_access_token(sub: str, multi_login: bool) -> AccessToken:
         to_encode, settings.TOKEN_SECRET_KEY, settings.TOKEN_ALGORITHM
     )
 
-    if multi_login is False:
-        key_prefix = f"{settings.TOKEN_REDIS_PREFIX}:{sub}"
-        await redis_client.delete_prefix(key_prefix)
-
-    key = f"{settings.TOKEN_REDIS_PREFIX}:{sub}:{access_token}"
-    await redis_client.setex(key, expire_seconds, access_token)
+    key = f"{settings.TOKEN_REDIS_PREFIX}:{sub}"
+    await store_token(key, access_token, expire, expire_seconds, multi_login)
     return AccessToken(access_token=access_token, access_token_expire_time=expire)
 
 
@@ -83,12 +238,8 @@ async def create_refresh_token(sub: str, multi_login: bool) -> RefreshToken:
         to_encode, settings.TOKEN_SECRET_KEY, settings.TOKEN_ALGORITHM
     )
 
-    if multi_login is False:
-        key_prefix = f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}"
-        await redis_client.delete_prefix(key_prefix)
-
-    key = f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{refresh_token}"
-    await redis_client.setex(key, expire_seconds, refresh_token)
+    key = f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}"
+    await store_token(key, refresh_token, expire, expire_seconds, multi_login)
     return RefreshToken(refresh_token=refresh_token, refresh_token_expire_time=expire)
 
 
@@ -104,19 +255,15 @@ async def create_new_token(
     :param multi_login:
     :return:
     """
-    redis_refresh_token = await redis_client.get(
-        f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{refresh_token}"
-    )
-    if not redis_refresh_token or redis_refresh_token != refresh_token:
+    refresh_token_key = f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}"
+    refresh_token_expire = await redis_client.hget(refresh_token_key, refresh_token)
+    if not token_alive(refresh_token_expire):
         raise TokenError(msg="Refresh Token 已过期")
 
     new_access_token = await create_access_token(sub, multi_login)
     new_refresh_token = await create_refresh_token(sub, multi_login)
 
-    token_key = f"{settings.TOKEN_REDIS_PREFIX}:{sub}:{token}"
-    refresh_token_key = f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{refresh_token}"
-    await redis_client.delete(token_key)
-    await redis_client.delete(refresh_token_key)
+    await delete_token(int(sub), token=token, refresh_token=refresh_token)
     return NewToken(
         new_access_token=new_access_token.access_token,
         new_access_token_expire_time=new_access_token.access_token_expire_time,
@@ -159,19 +306,28 @@ def jwt_decode(token: str) -> int:
     return user_id
 
 
-async def jwt_authentication(token: str) -> int:
+async def jwt_authentication(
+    user_id: int, token: str, with_user: bool = False
+) -> str | None:
     """
     JWT authentication
 
+    :param user_id: The decoded subject of the token
     :param token:
-    :return:
+    :param with_user: Fetch the redis cached user in the same round trip
+    :return: The redis cached user, if requested and present
     """
-    user_id = jwt_decode(token)
-    key = f"{settings.TOKEN_REDIS_PREFIX}:{user_id}:{token}"
-    token_verify = await redis_client.get(key)
-    if not token_verify:
+    key = f"{settings.TOKEN_REDIS_PREFIX}:{user_id}"
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hget(key, token)
+        if with_user:
+            pipe.get(f"{settings.JWT_USER_REDIS_PREFIX}:{user_id}")
+        token_expire, *cache_user = await pipe.execute()
+    if not token_alive(token_expire):
+        if token_expire is not None:
+            await redis_client.hdel(key, token)
         raise TokenError(msg="Token 已过期")
-    return user_id
+    return cache_user[0] if cache_user else None
 
 
 async def get_current_user(db: AsyncSession, pk: int) -> User:
@@ -201,6 +357,38 @@ async def get_current_user(db: AsyncSession, pk: int) -> User:
     return user
 
 
+async def delete_user_cache(*pks: int) -> None:
+    """
+    Delete cached users in redis and in every worker
+
+    :param pks: user ids
+    :return:
+    """
+    if not pks:
+        return
+    await redis_client.delete(*[f"{settings.JWT_USER_REDIS_PREFIX}:{pk}" for pk in pks])
+    message = ",".join(map(str, pks))
+    await _on_user_cache_change(message)
+    await redis_pubsub.publish(settings.JWT_USER_CHANNEL, message)
+
+
+async def _on_user_cache_change(message: str | None) -> None:
+    """
+    User cache change subscriber
+
+    :param message: comma separated user ids, None after (re)subscribing
+    :return:
+    """
+    if message is None:
+        user_cache.clear()
+        return
+    for pk in message.split(","):
+        user_cache.pop(int(pk))
+
+
+redis_pubsub.subscribe(settings.JWT_USER_CHANNEL, _on_user_cache_change)
+
+
 def superuser_verify(request: Request) -> bool:
     """
     Verify the current user permissions through token
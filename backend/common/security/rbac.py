@@ -1,49 +1,202 @@
+import asyncio
+import time
+
 import casbin
 import casbin_async_sqlalchemy_adapter
 
 from fastapi import Depends, Request
 
+from backend.app.admin.crud.crud_menu import menu_dao
 from backend.app.admin.model import CasbinRule
-from backend.common.enums import MethodType, StatusType
+from backend.common.enums import MethodType
 from backend.common.exception.errors import AuthorizationError, TokenError
+from backend.common.security.casbin_index import CasbinPolicyIndex
 from backend.common.security.jwt import DependsJwtAuth
 from backend.core.conf import settings
-from backend.database.db_mysql import async_engine
+from backend.database.db_mysql import async_db_session, async_engine
+from backend.database.db_redis import redis_client
+from backend.utils.local_cache import LocalCache
+from backend.utils.metrics import metrics
+from backend.utils.redis_pubsub import redis_pubsub
+
+# 规则数据作为死数据直接在模块内定义
+_CASBIN_RBAC_MODEL_CONF_TEXT = """
+[request_definition]
+r = sub, obj, act
+
+[policy_definition]
+p = sub, obj, act
+
+[role_definition]
+g = _, _
+
+[policy_effect]
+e = some(where (p.eft == allow))
+
+[matchers]
+m = g(r.sub, p.sub) && (keyMatch(r.obj, p.obj) || keyMatch3(r.obj, p.obj)) && (r.act == p.act || p.act == "*")
+"""  # noqa: E501
 
 
 class RBAC:
 
-    @staticmethod
-    async def enforcer() -> casbin.AsyncEnforcer:
+    def __init__(self):
+        self._adapter: casbin_async_sqlalchemy_adapter.Adapter | None = None
+        self._enforcer: casbin.AsyncEnforcer | None = None
+        self._policy_index: CasbinPolicyIndex | None = None
+        self._enforcer_version: int = 0
+        self._enforcer_stale: bool = True
+        self._enforcer_lock = asyncio.Lock()
+        redis_pubsub.subscribe(settings.RBAC_CASBIN_CHANNEL, self._on_policy_change)
+        self._role_menu_exclude = frozenset(settings.RBAC_ROLE_MENU_EXCLUDE)
+        self._role_menu_version: int = 0
+        self._role_menu_perms: LocalCache[
+            tuple[int, tuple[int, ...]], frozenset[str]
+        ] = LocalCache(settings.PERMISSION_LOCAL_CACHE_SIZE)
+        redis_pubsub.subscribe(
+            settings.RBAC_ROLE_MENU_CHANNEL, self._on_role_menu_change
+        )
+
+    async def enforcer(self) -> casbin.AsyncEnforcer:
         """
         获取 casbin 执行器
 
+        The enforcer is shared by the whole process, policies are only reloaded
+        after a policy change has been published
+
         :return:
         """
-        # 规则数据作为死数据直接在方法内定义
-        _CASBIN_RBAC_MODEL_CONF_TEXT = """
-        [request_definition]
-        r = sub, obj, act
+        if self._enforcer is not None and not self._enforcer_stale:
+            return self._enforcer
+        async with self._enforcer_lock:
+            if self._enforcer is None or self._enforcer_stale:
+                await self._reload_enforcer()
+        return self._enforcer
 
-        [policy_definition]
-        p = sub, obj, act
+    async def policy_index(self) -> CasbinPolicyIndex:
+        """
+        获取编译后的 casbin 策略索引，与执行器同步重载
 
-        [role_definition]
-        g = _, _
+        :return:
+        """
+        await self.enforcer()
+        return self._policy_index
+
+    async def _reload_enforcer(self) -> None:
+        """
+        Load policies into a new enforcer and swap it in, so that concurrent
+        requests never see a half loaded policy set
+
+        :return:
+        """
+        # Clear the flag first, a change published while loading triggers another reload
+        self._enforcer_stale = False
+        start_time = time.perf_counter()
+        try:
+            version = await redis_client.get(settings.RBAC_CASBIN_VERSION_REDIS_KEY)
+            if self._adapter is None:
+                self._adapter = casbin_async_sqlalchemy_adapter.Adapter(
+                    async_engine, db_class=CasbinRule
+                )
+            model = casbin.AsyncEnforcer.new_model(text=_CASBIN_RBAC_MODEL_CONF_TEXT)
+            enforcer = casbin.AsyncEnforcer(model, self._adapter)
+            await enforcer.load_policy()
+            policy_index = CasbinPolicyIndex(
+                enforcer.get_policy(), enforcer.get_grouping_policy()
+            )
+        except Exception:
+            self._enforcer_stale = True
+            metrics.incr("casbin_policy_reload_error")
+            raise
+        self._enforcer = enforcer
+        self._policy_index = policy_index
+        self._enforcer_version = int(version or 0)
+        metrics.observe("casbin_policy_reload", time.perf_counter() - start_time)
+
+    async def _on_policy_change(self, version: str | None) -> None:
+        """
+        Policy change subscriber
 
-        [policy_effect]
-        e = some(where (p.eft == allow))
+        :param version: None after (re)subscribing, the latest version is read from redis
+        :return:
+        """
+        if version is None:
+            version = await redis_client.get(settings.RBAC_CASBIN_VERSION_REDIS_KEY)
+        if int(version or 0) != self._enforcer_version:
+            self._enforcer_stale = True
 
-        [matchers]
-        m = g(r.sub, p.sub) && (keyMatch(r.obj, p.obj) || keyMatch3(r.obj, p.obj)) && (r.act == p.act || p.act == "*")
+    async def notify_policy_change(self) -> None:
         """
-        adapter = casbin_async_sqlalchemy_adapter.Adapter(
-            async_engine, db_class=CasbinRule
+        Bump the policy version and notify every worker to reload
+
+        :return:
+        """
+        self._enforcer_stale = True
+        version = await redis_client.incr(settings.RBAC_CASBIN_VERSION_REDIS_KEY)
+        await redis_pubsub.publish(settings.RBAC_CASBIN_CHANNEL, str(version))
+
+    async def get_role_menu_perms(self, role_ids: list[int]) -> frozenset[str]:
+        """
+        获取角色集合的菜单权限标识
+
+        Looked up in the process cache, then redis, then the database. The
+        cache key contains the role-menu version, so entries of an older
+        version are never read again
+
+        :param role_ids:
+        :return:
+        """
+        role_set = tuple(sorted(set(role_ids)))
+        version = self._role_menu_version
+        perms = self._role_menu_perms.get((version, role_set))
+        if perms is not None:
+            return perms
+        key = (
+            f"{settings.PERMISSION_REDIS_PREFIX}:role:{version}:"
+            f"{','.join(map(str, role_set))}"
         )
-        model = casbin.AsyncEnforcer.new_model(text=_CASBIN_RBAC_MODEL_CONF_TEXT)
-        enforcer = casbin.AsyncEnforcer(model, adapter)
-        await enforcer.load_policy()
-        return enforcer
+        cache_perms = await redis_client.get(key)
+        if cache_perms is not None:
+            perms = frozenset(filter(None, cache_perms.split(",")))
+        else:
+            async with async_db_session() as db:
+                menu_perms = await menu_dao.get_role_perms(db, list(role_set))
+            perms = frozenset(
+                perm
+                for menu_perm in menu_perms
+                for perm in menu_perm.split(",")
+                if perm
+            )
+            await redis_client.setex(
+                key, settings.PERMISSION_REDIS_EXPIRE_SECONDS, ",".join(sorted(perms))
+            )
+        self._role_menu_perms.set((version, role_set), perms)
+        return perms
+
+    async def _on_role_menu_change(self, version: str | None) -> None:
+        """
+        Role-menu change subscriber
+
+        :param version: None after (re)subscribing, the latest version is read from redis
+        :return:
+        """
+        if version is None:
+            version = await redis_client.get(settings.RBAC_ROLE_MENU_VERSION_REDIS_KEY)
+        version = int(version or 0)
+        if version != self._role_menu_version:
+            self._role_menu_version = version
+            self._role_menu_perms.clear()
+
+    async def notify_role_menu_change(self) -> None:
+        """
+        Drop cached role-menu permissions and bump the version in every worker
+
+        :return:
+        """
+        await redis_client.delete_prefix(settings.PERMISSION_REDIS_PREFIX)
+        version = await redis_client.incr(settings.RBAC_ROLE_MENU_VERSION_REDIS_KEY)
+        await self._on_role_menu_change(str(version))
+        await redis_pubsub.publish(settings.RBAC_ROLE_MENU_CHANNEL, str(version))
 
     async def rbac_verify(self, request: Request, _token: str = DependsJwtAuth) -> None:
         """
@@ -84,21 +237,19 @@ class RBAC:
             # 没有菜单权限标识不校验
             if not path_auth_perm:
                 return
-            if path_auth_perm in set(settings.RBAC_ROLE_MENU_EXCLUDE):
+            if path_auth_perm in self._role_menu_exclude:
                 return
-            allow_perms = []
-            for role in user_roles:
-                for menu in role.menus:
-                    if menu.status == StatusType.enable:
-                        allow_perms.extend(menu.perms.split(","))
+            allow_perms = await self.get_role_menu_perms(
+                [role.id for role in user_roles]
+            )
             if path_auth_perm not in allow_perms:
                 raise AuthorizationError
         else:
             # casbin 权限校验
             if (method, path) in settings.RBAC_CASBIN_EXCLUDE:
                 return
-            enforcer = await self.enforcer()
-            if not enforcer.enforce(user_uuid, path, method):
+            policy_index = await self.policy_index()
+            if not policy_index.enforce(user_uuid, path, method):
                 raise AuthorizationError
 
 
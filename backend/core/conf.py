@@ -1,10 +1,12 @@
+import os
+
 from functools import lru_cache
 from typing import Literal
 
 from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-from backend.core.path_conf import BasePath
+from backend.core.path_conf import LOG_ARCHIVE_DIR, BasePath
 
 
 class Settings(BaseSettings):
@@ -70,27 +72,60 @@ class Settings(BaseSettings):
         f"{FASTAPI_API_V1_PATH}/auth/login",
     ]
 
+    # Password
+    # New hashes use the first scheme, hashes of the other schemes or with other
+    # costs are still verified and rehashed on the next successful login.
+    # argon2 requires argon2-cffi
+    PASSWORD_HASH_SCHEMES: list[Literal["bcrypt", "argon2"]] = ["bcrypt"]
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 64 * 1024  # KiB
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_MAX_WORKERS: int = os.cpu_count() or 1
+
     # JWT
     JWT_USER_REDIS_PREFIX: str = ""
     JWT_USER_REDIS_EXPIRE_SECONDS: int = 60 * 60 * 24 * 7
+    JWT_USER_CHANNEL: str = "fba:jwt_user:channel"
+    JWT_USER_LOCAL_CACHE_SIZE: int = 1024
+    JWT_USER_LOCAL_CACHE_EXPIRE_SECONDS: int = 60
 
     # Permission (RBAC)
     PERMISSION_MODE: Literal["casbin", "role-menu"] = "casbin"
     PERMISSION_REDIS_PREFIX: str = "fba:permission"
+    PERMISSION_REDIS_EXPIRE_SECONDS: int = 60 * 60 * 24 * 7
+    PERMISSION_LOCAL_CACHE_SIZE: int = 1024
 
     # RBAC
     # Casbin
+    RBAC_CASBIN_VERSION_REDIS_KEY: str = "fba:casbin:version"
+    RBAC_CASBIN_CHANNEL: str = "fba:casbin:channel"
     RBAC_CASBIN_EXCLUDE: set[tuple[str, str]] = {
         ("POST", f"{FASTAPI_API_V1_PATH}/auth/logout"),
         ("POST", f"{FASTAPI_API_V1_PATH}/auth/token/new"),
     }
 
     # Role-Menu
+    RBAC_ROLE_MENU_VERSION_REDIS_KEY: str = "fba:role_menu:version"
+    RBAC_ROLE_MENU_CHANNEL: str = "fba:role_menu:channel"
     RBAC_ROLE_MENU_EXCLUDE: list[str] = [
         "sys:monitor:redis",
         "sys:monitor:server",
+        "sys:monitor:metrics",
     ]
 
+    # Tree
+    TREE_VERSION_REDIS_KEY: str = "fba:tree:version"
+    TREE_CHANNEL: str = "fba:tree:channel"
+    TREE_LOCAL_CACHE_SIZE: int = 1024
+
+    # Pagination
+    PAGINATION_COUNT_REDIS_PREFIX: str = "fba:paging:count"
+    PAGINATION_COUNT_EXPIRE_SECONDS: int = 60
+
+    # Export
+    EXPORT_FETCH_SIZE: int = 1000
+
     # Cookies
     COOKIE_REFRESH_TOKEN_KEY: str = ""
     COOKIE_REFRESH_TOKEN_EXPIRE_SECONDS: int = TOKEN_REFRESH_EXPIRE_SECONDS
@@ -146,6 +181,43 @@ class Settings(BaseSettings):
     IP_LOCATION_PARSE: Literal["online", "offline", "false"] = "offline"
     IP_LOCATION_REDIS_PREFIX: str = "fba:ip:location"
     IP_LOCATION_EXPIRE_SECONDS: int = 60 * 60 * 24 * 1
+    IP_LOCATION_OFFLINE_CACHE_SIZE: int = 10000
+
+    # User agent
+    USER_AGENT_PARSE_CACHE_SIZE: int = 4096
+
+    # Log retention
+    OPERA_LOG_RETENTION_DAYS: int = 30
+    LOGIN_LOG_RETENTION_DAYS: int = 90
+    LOG_RETENTION_BATCH_SIZE: int = 5000
+    LOG_RETENTION_BATCH_INTERVAL_MS: int = 200
+
+    # Log partition
+    LOG_PARTITION_ENABLED: bool = False
+    LOG_PARTITION_PRECREATE_MONTHS: int = 3
+
+    # Log archive
+    OPERA_LOG_ARCHIVE_ENABLED: bool = False
+    # Local directory or fsspec url such as s3://bucket/prefix, urls require fsspec
+    LOG_ARCHIVE_PATH: str = LOG_ARCHIVE_DIR
+    LOG_ARCHIVE_STORAGE_OPTIONS: dict = {}
+    # zstd requires zstandard
+    LOG_ARCHIVE_COMPRESSION: Literal["gzip", "zstd"] = "gzip"
+
+    # Log search
+    # n-gram FULLTEXT indexes for contains search, ignored with LOG_PARTITION_ENABLED
+    # since InnoDB does not support them on partitioned tables
+    LOG_FULLTEXT_ENABLED: bool = False
+
+    # Opera log rollup
+    OPERA_LOG_ROLLUP_BATCH_SIZE: int = 5000
+    # Logs are rolled up once they are this old, so late commits are not skipped
+    OPERA_LOG_ROLLUP_DELAY_SECONDS: int = 60
+    OPERA_LOG_ROLLUP_LOCK_REDIS_KEY: str = "fba:opera_log:rollup:lock"
+    OPERA_LOG_ROLLUP_LOCK_TIMEOUT_SECONDS: int = 300
+    # Day rollups are kept forever
+    OPERA_LOG_ROLLUP_RETENTION_DAYS: dict[str, int] = {"minute": 7, "hour": 180}
+    OPERA_LOG_ROLLUP_HISTOGRAM_ACCURACY: float = 0.01
 
     # Opera log
     OPERA_LOG_PATH_EXCLUDE: list[str] = [
@@ -158,6 +230,9 @@ class Settings(BaseSettings):
         f"{FASTAPI_API_V1_PATH}/oauth2/linux-do/callback",
     ]
     OPERA_LOG_ENCRYPT_TYPE: int = 1
+    OPERA_LOG_QUEUE_MAX_SIZE: int = 10000
+    OPERA_LOG_BATCH_SIZE: int = 500
+    OPERA_LOG_FLUSH_INTERVAL_MS: int = 1000
     OPERA_LOG_ENCRYPT_KEY_INCLUDE: list[str] = [
         "password",
         "old_password",
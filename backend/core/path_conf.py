@@ -9,3 +9,9 @@ ALEMBIC_Versions_DIR = os.path.join(BasePath, "alembic", "versions")
 
 # log path
 LOG_DIR = os.path.join(BasePath, "log")
+
+# Archived log path
+LOG_ARCHIVE_DIR = os.path.join(BasePath, "archive")
+
+# Offline ip2region xdb file path
+IP2REGION_XDB = os.path.join(BasePath, "static", "ip2region.xdb")
@@ -6,6 +6,8 @@ from fastapi_limiter import FastAPILimiter
 from fastapi_pagination import add_pagination
 from starlette.middleware.authentication import AuthenticationMiddleware
 
+from backend.app.admin.service.captcha_service import captcha_pool
+from backend.app.admin.service.opera_log_service import opera_log_writer
 from backend.app.router import route
 from backend.common.exception.exception_handler import register_exception
 from backend.common.log import set_customize_logfile, setup_logging
@@ -18,6 +20,8 @@ from backend.middleware.state_middleware import StateMiddleware
 from backend.utils.demo_site import demo_site
 from backend.utils.health_check import ensure_unique_route_names, http_limit_callback
 from backend.utils.openapi import simplify_operation_ids
+from backend.utils.redis_pubsub import redis_pubsub
+from backend.utils.request_parse import open_ip2region_xdb
 from backend.utils.serializers import MsgSpecJSONResponse
 
 
@@ -28,6 +32,9 @@ async def register_init(app: FastAPI):
 
     :return:
     """
+    # Load offline ip location database
+    if settings.IP_LOCATION_PARSE == "offline":
+        open_ip2region_xdb()
     # Create table
     await create_table()
     # Open redis connection
@@ -38,9 +45,21 @@ async def register_init(app: FastAPI):
         prefix=settings.REQUEST_LIMITER_REDIS_PREFIX,
         http_callback=http_limit_callback,
     )
+    # Start redis pub/sub listener
+    await redis_pubsub.start()
+    # Start operation log writer
+    await opera_log_writer.start()
+    # Start captcha pool refill
+    await captcha_pool.start()
 
     yield
 
+    # Stop captcha pool refill
+    await captcha_pool.close()
+    # Write buffered operation logs
+    await opera_log_writer.close()
+    # Stop redis pub/sub listener
+    await redis_pubsub.close()
     # Close redis connection
     await redis_client.close()
     # Close limiter
@@ -48,6 +48,34 @@ class JwtAuthMiddleware(AuthenticationBackend):
             status_code=exc.code,
         )
 
+    @staticmethod
+    async def get_current_user(
+        sub: int, cache_user: str | None, version: int
+    ) -> CurrentUserIns:
+        """
+        Load user from the redis cache or database and keep it in the worker cache
+
+        :param sub:
+        :param cache_user: The redis cached user
+        :param version: The worker cache version read before fetching cache_user
+        :return:
+        """
+        if not cache_user:
+            async with async_db_session() as db:
+                current_user = await jwt.get_current_user(db, sub)
+                user = CurrentUserIns(**select_as_dict(current_user))
+                await redis_client.setex(
+                    f"{settings.JWT_USER_REDIS_PREFIX}:{sub}",
+                    settings.JWT_USER_REDIS_EXPIRE_SECONDS,
+                    user.model_dump_json(),
+                )
+        else:
+            user = CurrentUserIns.model_validate(
+                from_json(cache_user, allow_partial=True)
+            )
+        jwt.user_cache.set(sub, user, version=version)
+        return user
+
     async def authenticate(
         self, request: Request
     ) -> tuple[AuthCredentials, CurrentUserIns] | None:
@@ -63,23 +91,15 @@ class JwtAuthMiddleware(AuthenticationBackend):
             return
 
         try:
-            sub = await jwt.jwt_authentication(token)
-            cache_user = await redis_client.get(
-                f"{settings.JWT_USER_REDIS_PREFIX}:{sub}"
+            sub = jwt.jwt_decode(token)
+            user = jwt.user_cache.get(sub)
+            # Read before fetching, a user invalidated meanwhile is not cached
+            version = jwt.user_cache.version
+            cache_user = await jwt.jwt_authentication(
+                sub, token, with_user=user is None
             )
-            if not cache_user:
-                async with async_db_session() as db:
-                    current_user = await jwt.get_current_user(db, sub)
-                    user = CurrentUserIns(**select_as_dict(current_user))
-                    await redis_client.setex(
-                        f"{settings.JWT_USER_REDIS_PREFIX}:{sub}",
-                        settings.JWT_USER_REDIS_EXPIRE_SECONDS,
-                        user.model_dump_json(),
-                    )
-            else:
-                user = CurrentUserIns.model_validate(
-                    from_json(cache_user, allow_partial=True)
-                )
+            if user is None:
+                user = await self.get_current_user(sub, cache_user, version)
         except TokenError as exc:
             raise _AuthenticationError(
                 code=exc.code, msg=exc.detail, headers=exc.headers
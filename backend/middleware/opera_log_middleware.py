@@ -1,31 +1,38 @@
-from asyncio import create_task
-
 from asgiref.sync import sync_to_async
-from fastapi import Response
 from starlette.datastructures import UploadFile
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from backend.app.admin.schema.opera_log import CreateOperaLogParam
-from backend.app.admin.service.opera_log_service import OperaLogService
+from backend.app.admin.service.opera_log_service import opera_log_writer
 from backend.common.dataclasses import RequestCallNext
 from backend.common.enums import OperaLogCipherType, StatusType
 from backend.common.log import log
 from backend.core.conf import settings
 from backend.utils.encrypt import AESCipher, ItsDCipher, Md5Cipher
+from backend.utils.request_parse import enrich_request_state
 from backend.utils.timezone import timezone
 from backend.utils.trace_id import get_request_trace_id
 
 
-class OperaLogMiddleware(BaseHTTPMiddleware):
+class OperaLogMiddleware:
     """Operation log middleware"""
 
-    async def dispatch(self, request: Request, call_next) -> Response:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
         path = request.url.path
         if path in settings.OPERA_LOG_PATH_EXCLUDE or not path.startswith(
             f"{settings.FASTAPI_API_V1_PATH}"
         ):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         try:
             username = request.user.username
@@ -34,12 +41,19 @@ class OperaLogMiddleware(BaseHTTPMiddleware):
         method = request.method
         args = await self.get_request_args(request)
         args = await self.desensitization(args)
+        # The body is cached by get_request_args, replay it to the app
+        body = await request.body()
 
         start_time = timezone.now()
-        request_next = await self.execute_request(request, call_next)
+        request_next = await self.execute_request(
+            request, self.replay_receive(body, receive), send
+        )
         end_time = timezone.now()
         cost_time = (end_time - start_time).total_seconds() * 1000.0
 
+        # The response has been sent, resolve ip location and user agent now
+        await enrich_request_state(request)
+
         _route = request.scope.get("route")
         summary = getattr(_route, "summary", None) or ""
 
@@ -64,22 +78,42 @@ class OperaLogMiddleware(BaseHTTPMiddleware):
             cost_time=cost_time,
             opera_time=start_time,
         )
-        create_task(OperaLogService.create(obj_in=opera_log_in))  # noqa: ignore
+        opera_log_writer.put(opera_log_in)
 
         err = request_next.err
         if err:
             raise err from None
 
-        return request_next.response
+    @staticmethod
+    def replay_receive(body: bytes, receive: Receive) -> Receive:
+        """
+        Hand the already consumed body to the app once, then fall back to the
+        server channel, e.g. for disconnect messages
 
-    async def execute_request(self, request: Request, call_next) -> RequestCallNext:
+        :param body:
+        :param receive:
+        :return:
+        """
+        body_sent = False
+
+        async def wrapper() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return wrapper
+
+    async def execute_request(
+        self, request: Request, receive: Receive, send: Send
+    ) -> RequestCallNext:
         code = 200
         msg = "Success"
         status = StatusType.enable
         err = None
-        response = None
         try:
-            response = await call_next(request)
+            await self.app(request.scope, receive, send)
             code, msg = self.request_exception_handler(request, code, msg)
         except Exception as e:
             log.error(f"请求异常: {e}")
@@ -88,9 +122,7 @@ class OperaLogMiddleware(BaseHTTPMiddleware):
             status = StatusType.disable
             err = e
 
-        return RequestCallNext(
-            code=str(code), msg=msg, status=status, err=err, response=response
-        )
+        return RequestCallNext(code=str(code), msg=msg, status=status, err=err)
 
     @staticmethod
     def request_exception_handler(
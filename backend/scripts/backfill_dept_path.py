@@ -0,0 +1,68 @@
+"""
+Rebuild the ancestry path of every department from parent_id
+
+The script is idempotent, only departments whose path differs are updated
+"""
+
+import logging
+import sys
+
+from anyio import run
+from sqlalchemy import bindparam, select, update
+
+sys.path.append("../")
+
+from backend.app.admin.model import Dept
+from backend.database.db_mysql import async_db_session, async_engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def build_paths(rows: list[tuple[int, int | None]]) -> dict[int, str]:
+    """
+    Build paths top down, departments whose parent does not exist become roots
+
+    :param rows: (id, parent_id) of all departments
+    :return:
+    """
+    parents = dict(rows)
+    children: dict[int | None, list[int]] = {}
+    for pk, parent_id in rows:
+        if parent_id not in parents:
+            parent_id = None
+        children.setdefault(parent_id, []).append(pk)
+    paths = {}
+    stack = [(pk, "/") for pk in children.get(None, [])]
+    while stack:
+        pk, parent_path = stack.pop()
+        paths[pk] = f"{parent_path}{pk}/"
+        stack.extend((child, paths[pk]) for child in children.get(pk, []))
+    return paths
+
+
+async def backfill() -> None:
+    async with async_db_session.begin() as db:
+        result = await db.execute(select(Dept.id, Dept.parent_id, Dept.path))
+        rows = result.all()
+        paths = build_paths([(pk, parent_id) for pk, parent_id, _ in rows])
+        if len(paths) != len(rows):
+            logger.warning(f"Skipped {len(rows) - len(paths)} departments in a cycle")
+        changed = [
+            {"dept_id": pk, "dept_path": paths[pk]}
+            for pk, _, path in rows
+            if pk in paths and paths[pk] != path
+        ]
+        if changed:
+            stmt = (
+                update(Dept.__table__)
+                .where(Dept.__table__.c.id == bindparam("dept_id"))
+                .values(path=bindparam("dept_path"))
+            )
+            await db.execute(stmt, changed)
+    logger.info(f"Updated the path of {len(changed)} departments")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    run(backfill)
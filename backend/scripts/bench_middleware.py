@@ -0,0 +1,106 @@
+"""
+Per-request overhead of BaseHTTPMiddleware versus pure ASGI middleware
+
+Both stacks wrap the same plain ASGI endpoint with the same number of no-op
+layers, requests are driven directly through the ASGI interface so no client
+or server cost is included
+
+Usage: python3 ./scripts/bench_middleware.py [--layers 3] [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+async def endpoint(scope: Scope, receive: Receive, send: Send) -> None:
+    await receive()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain")],
+        }
+    )
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+class NoopHTTPMiddleware(BaseHTTPMiddleware):
+
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+class NoopASGIMiddleware:
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(scope, receive, send)
+
+
+def build(middleware: type, layers: int) -> ASGIApp:
+    app = endpoint
+    for _ in range(layers):
+        app = middleware(app)
+    return app
+
+
+async def request(app: ASGIApp) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        pass
+
+    await app(scope, receive, send)
+
+
+async def bench(app: ASGIApp, requests: int) -> float:
+    for _ in range(min(requests, 1000)):
+        await request(app)
+    start_time = time.perf_counter()
+    for _ in range(requests):
+        await request(app)
+    return (time.perf_counter() - start_time) / requests * 1_000_000
+
+
+async def main(layers: int, requests: int) -> None:
+    baseline = await bench(endpoint, requests)
+    print(f"endpoint only:                  {baseline:8.2f} us/request")
+    for name, middleware in (
+        ("BaseHTTPMiddleware", NoopHTTPMiddleware),
+        ("pure ASGI middleware", NoopASGIMiddleware),
+    ):
+        cost = await bench(build(middleware, layers), requests)
+        print(
+            f"{layers} x {name:<22} {cost:8.2f} us/request, "
+            f"{(cost - baseline) / layers:6.2f} us per layer"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--layers", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.layers, args.requests))
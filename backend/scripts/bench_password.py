@@ -0,0 +1,78 @@
+"""
+Password hash cost and login verification throughput per scheme and cost
+
+Every configuration is verified concurrently through a thread pool the same
+way logins are, use it to pick PASSWORD_* settings for a deployment
+
+Usage: python3 ./scripts/bench_password.py [--bcrypt-rounds 10 12]
+    [--argon2-time-cost 2 3] [--argon2-memory-cost 65536] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+
+def contexts(args: argparse.Namespace) -> list[tuple[str, CryptContext]]:
+    result = [
+        (f"bcrypt rounds={rounds}", CryptContext(["bcrypt"], bcrypt__rounds=rounds))
+        for rounds in args.bcrypt_rounds
+    ]
+    for time_cost in args.argon2_time_cost:
+        for memory_cost in args.argon2_memory_cost:
+            context = CryptContext(
+                ["argon2"],
+                argon2__type="ID",
+                argon2__time_cost=time_cost,
+                argon2__memory_cost=memory_cost,
+                argon2__parallelism=args.argon2_parallelism,
+            )
+            result.append((f"argon2id t={time_cost} m={memory_cost}KiB", context))
+    return result
+
+
+async def throughput(
+    context: CryptContext, hashed: str, executor: ThreadPoolExecutor, logins: int
+) -> float:
+    loop = asyncio.get_running_loop()
+    start_time = time.perf_counter()
+    await asyncio.gather(
+        *[
+            loop.run_in_executor(executor, context.verify, "password", hashed)
+            for _ in range(logins)
+        ]
+    )
+    return logins / (time.perf_counter() - start_time)
+
+
+async def main(args: argparse.Namespace) -> None:
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    print(f"{args.logins} concurrent logins on {args.workers} workers")
+    for name, context in contexts(args):
+        try:
+            start_time = time.perf_counter()
+            hashed = context.hash("password")
+        except Exception as e:
+            print(f"{name:<32} unavailable: {e}")
+            continue
+        hash_cost = (time.perf_counter() - start_time) * 1000
+        logins = await throughput(context, hashed, executor, args.logins)
+        print(f"{name:<32} hash {hash_cost:8.1f} ms, {logins:8.1f} logins/s")
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="*", default=[10, 12])
+    parser.add_argument("--argon2-time-cost", type=int, nargs="*", default=[2, 3])
+    parser.add_argument("--argon2-memory-cost", type=int, nargs="*", default=[65536])
+    parser.add_argument("--argon2-parallelism", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,100 @@
+"""
+Tree building time of the linear traversal builder versus the previous
+traversal builder and the recursive builder
+
+Nodes are generated in memory, so only the tree building itself is measured.
+The recursive builder is quadratic and skipped above --recursive-max nodes
+
+Usage: python3 ./scripts/bench_tree.py [--sizes 10000 100000] [--recursive-max 10000]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from typing import Any, Callable
+
+sys.path.append("../")
+
+from backend.utils.build_tree import recursive_to_tree, traversal_to_tree
+
+
+def legacy_traversal_to_tree(nodes: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """traversal_to_tree before the linear rewrite, kept for comparison"""
+    tree = []
+    node_dict = {node["id"]: node for node in nodes}
+
+    for node in nodes:
+        parent_id = node["parent_id"]
+        if parent_id is None:
+            tree.append(node)
+        else:
+            parent_node = node_dict.get(parent_id)
+            if parent_node is not None:
+                if "children" not in parent_node:
+                    parent_node["children"] = []
+                if node not in parent_node["children"]:
+                    parent_node["children"].append(node)
+            else:
+                if node not in tree:
+                    tree.append(node)
+
+    return tree
+
+
+def make_nodes(size: int, shape: str) -> list[dict[str, Any]]:
+    """
+    Generate tree nodes
+
+    :param size:
+    :param shape: wide puts every node under one root, random attaches each
+        node to a random earlier node
+    :return:
+    """
+    rand = random.Random(size)
+    nodes = []
+    for pk in range(1, size + 1):
+        if pk == 1:
+            parent_id = None
+        elif shape == "wide":
+            parent_id = 1
+        else:
+            parent_id = rand.randint(1, pk - 1)
+        nodes.append(
+            {"id": pk, "parent_id": parent_id, "name": f"node {pk}", "sort": pk}
+        )
+    return nodes
+
+
+def bench(builder: Callable[[list[dict[str, Any]]], Any], nodes: list) -> float:
+    # Builders add children to the nodes, every run gets fresh copies
+    nodes = [dict(node) for node in nodes]
+    start_time = time.perf_counter()
+    builder(nodes)
+    return (time.perf_counter() - start_time) * 1000
+
+
+def main(sizes: list[int], recursive_max: int) -> None:
+    builders = (
+        ("traversal", traversal_to_tree),
+        ("legacy traversal", legacy_traversal_to_tree),
+        ("recursive", recursive_to_tree),
+    )
+    for size in sizes:
+        for shape in ("random", "wide"):
+            nodes = make_nodes(size, shape)
+            for name, builder in builders:
+                if builder is recursive_to_tree and size > recursive_max:
+                    print(f"{size:>7} {shape:<6} {name:<16}  skipped")
+                    continue
+                cost = bench(builder, nodes)
+                print(f"{size:>7} {shape:<6} {name:<16} {cost:10.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--recursive-max", type=int, default=10000)
+    args = parser.parse_args()
+    main(args.sizes, args.recursive_max)
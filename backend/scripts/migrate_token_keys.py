@@ -0,0 +1,95 @@
+"""
+Move tokens stored as `{prefix}:{user_id}:{token}` string keys into the
+per-user token hashes `{prefix}:{user_id}`
+
+The script is idempotent and can be run while the service is up, tokens
+issued by the old layout keep working once migrated
+"""
+
+import logging
+import sys
+
+from anyio import run
+
+sys.path.append("../")
+
+from backend.core.conf import settings
+from backend.database.db_redis import redis_client
+from backend.utils.timezone import timezone
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def migrate_prefix(prefix: str, batch_size: int = 500) -> int:
+    """
+    Migrate old token keys of one prefix
+
+    :param prefix:
+    :param batch_size:
+    :return: The number of migrated tokens
+    """
+    migrated = 0
+    keys = []
+    async for key in redis_client.scan_iter(match=f"{prefix}:*:*", count=batch_size):
+        keys.append(key)
+        if len(keys) >= batch_size:
+            migrated += await migrate_keys(prefix, keys)
+            keys = []
+    if keys:
+        migrated += await migrate_keys(prefix, keys)
+    return migrated
+
+
+async def migrate_keys(prefix: str, keys: list[str]) -> int:
+    """
+    Migrate a batch of old token keys
+
+    :param prefix:
+    :param keys:
+    :return:
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.ttl(key)
+        ttls = await pipe.execute()
+    now = int(timezone.now().timestamp())
+    tokens: dict[str, dict[str, int]] = {}
+    # Keys that are not valid tokens are left alone
+    migrated_keys = []
+    for key, ttl in zip(keys, ttls):
+        user_id, _, token = key[len(prefix) + 1 :].partition(":")
+        if user_id.isdigit() and token and ttl > 0:
+            tokens.setdefault(f"{prefix}:{user_id}", {})[token] = ttl
+            migrated_keys.append(key)
+    if not tokens:
+        return 0
+    # EXPIRE GT needs redis 7, compare with the current ttl instead
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for hash_key in tokens:
+            pipe.ttl(hash_key)
+        hash_ttls = await pipe.execute()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for (hash_key, token_ttls), hash_ttl in zip(tokens.items(), hash_ttls):
+            pipe.hset(
+                hash_key,
+                mapping={token: now + ttl for token, ttl in token_ttls.items()},
+            )
+            max_ttl = max(token_ttls.values())
+            if hash_ttl < max_ttl:
+                pipe.expire(hash_key, max_ttl)
+        pipe.delete(*migrated_keys)
+        await pipe.execute()
+    return sum(len(token_ttls) for token_ttls in tokens.values())
+
+
+async def migrate() -> None:
+    for prefix in (settings.TOKEN_REDIS_PREFIX, settings.TOKEN_REFRESH_REDIS_PREFIX):
+        logger.info(f"Migrating token keys of {prefix}")
+        migrated = await migrate_prefix(prefix)
+        logger.info(f"Migrated {migrated} token keys of {prefix}")
+    await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    run(migrate)
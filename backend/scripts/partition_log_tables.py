@@ -0,0 +1,67 @@
+"""
+Convert existing log tables to monthly partitions, for LOG_PARTITION_ENABLED
+
+Alembic autogenerate does not compare partitions, so tables created before
+partitioning was enabled are converted here. The primary key becomes
+(id, created_time) and every month since the oldest log gets its own
+partition. Both statements rebuild the table, run it in a maintenance window
+
+The script is idempotent, tables that are already partitioned are skipped
+"""
+
+import logging
+import sys
+
+from anyio import run
+from sqlalchemy import func, select, text
+
+sys.path.append("../")
+
+from backend.app.admin.model import LoginLog, OperaLog
+from backend.app.admin.service.log_partition_service import (
+    log_partition_service,
+    month_partition,
+    month_start,
+)
+from backend.core.conf import settings
+from backend.database.db_mysql import async_db_session, async_engine
+from backend.utils.timezone import timezone
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def partition() -> None:
+    async with async_db_session() as db:
+        for model in (OperaLog, LoginLog):
+            table = model.__tablename__
+            if await log_partition_service.get_partition_months(db, model) is not None:
+                logger.info(f"{table} is already partitioned")
+                continue
+            now = timezone.now()
+            oldest = await db.scalar(select(func.min(model.created_time))) or now
+            month = month_start(oldest)
+            last = month_start(now, settings.LOG_PARTITION_PRECREATE_MONTHS)
+            partitions = []
+            while month <= last:
+                partitions.append(month_partition(month))
+                month = month_start(month, 1)
+            partitions.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+            await db.execute(
+                text(
+                    f"ALTER TABLE {table} DROP PRIMARY KEY, "
+                    f"ADD PRIMARY KEY (id, created_time)"
+                )
+            )
+            await db.execute(
+                text(
+                    f"ALTER TABLE {table} PARTITION BY RANGE COLUMNS(created_time) "
+                    f"({', '.join(partitions)})"
+                )
+            )
+            logger.info(f"Partitioned {table} into {len(partitions)} partitions")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    run(partition)
@@ -5,3 +5,7 @@ alembic revision --autogenerate
 alembic upgrade head
 
 python3 ./scripts/init_data.py
+
+python3 ./scripts/migrate_token_keys.py
+
+python3 ./scripts/backfill_dept_path.py
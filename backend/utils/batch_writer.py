@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+from typing import Awaitable, Callable, Generic, TypeVar
+
+from backend.common.log import log
+from backend.utils.metrics import metrics
+
+_T = TypeVar("_T")
+
+
+class BatchWriter(Generic[_T]):
+    """
+    Bounded in-process buffer flushed in batches by a background task
+
+    Items are flushed every `flush_interval_ms` or as soon as `batch_size`
+    items are buffered. `put` never waits, items are dropped and counted when
+    the buffer is full, so a slow database can not stall requests
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[list[_T]], Awaitable[None]],
+        *,
+        max_size: int,
+        batch_size: int,
+        flush_interval_ms: int,
+    ):
+        self.name = name
+        self._flush = flush
+        self._max_size = max_size
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval_ms / 1000.0
+        self._queue: asyncio.Queue[_T] | None = None
+        self._task: asyncio.Task | None = None
+        metrics.register_gauge(f"{name}_queue_size", self.qsize)
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def put(self, item: _T) -> bool:
+        """
+        Buffer an item
+
+        :param item:
+        :return: False if the item was dropped
+        """
+        if self._queue is None:
+            metrics.incr(f"{self.name}_dropped")
+            log.warning(f"{self.name} writer is not running, item dropped")
+            return False
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            metrics.incr(f"{self.name}_dropped")
+            return False
+        return True
+
+    async def start(self) -> None:
+        """
+        Start flush task
+
+        :return:
+        """
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self._max_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Stop flush task and write everything still buffered
+
+        :return:
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while self._queue.qsize():
+            await self._write(self._take(self._batch_size))
+        self._queue = None
+
+    def _take(self, limit: int, batch: list[_T] | None = None) -> list[_T]:
+        batch = batch if batch is not None else []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self._flush_interval
+                while len(batch) < self._batch_size:
+                    self._take(self._batch_size, batch)
+                    timeout = deadline - loop.time()
+                    if len(batch) >= self._batch_size or timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    batch.append(item)
+            except asyncio.CancelledError:
+                # Items already taken from the queue are not drained by `close`
+                await self._write(batch)
+                raise
+            # Shielded, so that cancelling on shutdown lets a running write finish
+            write = asyncio.ensure_future(self._write(batch))
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                await write
+                raise
+
+    async def _write(self, batch: list[_T]) -> None:
+        if not batch:
+            return
+        start_time = time.perf_counter()
+        try:
+            await self._flush(batch)
+        except Exception as e:
+            metrics.incr(f"{self.name}_flush_error")
+            metrics.incr(f"{self.name}_dropped", len(batch))
+            log.error(
+                f"{self.name} batch write failed, {len(batch)} items dropped: {e}"
+            )
+            return
+        metrics.incr(f"{self.name}_written", len(batch))
+        metrics.observe(f"{self.name}_flush", time.perf_counter() - start_time)
@@ -1,40 +1,42 @@
 from typing import Any, Sequence
 
+from sqlalchemy import Row
+
 from backend.common.enums import BuildTreeType
 from backend.utils.serializers import RowData, select_list_serialize
 
 
 def get_tree_nodes(row: Sequence[RowData]) -> list[dict[str, Any]]:
-    """获取所有树形结构节点"""
-    tree_nodes = select_list_serialize(row)
+    """获取所有树形结构节点，Core 查询的列元组直接转换，无需 ORM 序列化"""
+    if row and isinstance(row[0], Row):
+        tree_nodes = [dict(_._mapping) for _ in row]
+    else:
+        tree_nodes = select_list_serialize(row)
     tree_nodes.sort(key=lambda x: x["sort"])
     return tree_nodes
 
 
 def traversal_to_tree(nodes: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """
-    通过遍历算法构造树形结构
+    通过遍历算法构造树形结构，时间复杂度 O(n)
 
     :param nodes:
     :return:
     """
     tree = []
-    node_dict = {node["id"]: node for node in nodes}
+    node_dict = {}
+    for node in nodes:
+        # 重复节点只保留首次出现
+        node_dict.setdefault(node["id"], node)
 
     for node in nodes:
-        parent_id = node["parent_id"]
-        if parent_id is None:
-            tree.append(node)
+        if node_dict[node["id"]] is not node:
+            continue
+        parent_node = node_dict.get(node["parent_id"])
+        if parent_node is not None:
+            parent_node.setdefault("children", []).append(node)
         else:
-            parent_node = node_dict.get(parent_id)
-            if parent_node is not None:
-                if "children" not in parent_node:
-                    parent_node["children"] = []
-                if node not in parent_node["children"]:
-                    parent_node["children"].append(node)
-            else:
-                if node not in tree:
-                    tree.append(node)
+            tree.append(node)
 
     return tree
 
@@ -0,0 +1,78 @@
+import math
+
+from collections import defaultdict
+
+
+class LogHistogram:
+    """
+    Mergeable histogram with logarithmic buckets
+
+    Bucket i holds the values in (gamma^(i-1), gamma^i], every quantile is answered
+    with a relative error of at most relative_accuracy. Histograms of the same
+    accuracy are merged by adding the bucket counts, so rollups of any time range
+    can be combined without the raw values
+    """
+
+    # Smaller values, including 0, are counted in the bucket of min_value
+    min_value = 1e-6
+
+    def __init__(
+        self, buckets: dict[int, int] | None = None, relative_accuracy: float = 0.01
+    ):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: dict[int, int] = defaultdict(int, buckets or {})
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1) -> None:
+        """
+        Add a value
+
+        :param value:
+        :param count:
+        :return:
+        """
+        value = max(value, self.min_value)
+        self.buckets[math.ceil(math.log(value) / self._log_gamma)] += count
+
+    def merge(self, other: "LogHistogram") -> None:
+        """
+        Add the counts of a histogram with the same accuracy
+
+        :param other:
+        :return:
+        """
+        for index, count in other.buckets.items():
+            self.buckets[index] += count
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Get the value at quantile q
+
+        :param q: 0 <= q <= 1
+        :return: None if the histogram is empty
+        """
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket in relative terms
+                return 2 * self.gamma**index / (self.gamma + 1)
+        return None
+
+    def to_dict(self) -> dict[str, int]:
+        return {str(index): count for index, count in self.buckets.items() if count}
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, int], relative_accuracy: float = 0.01
+    ) -> "LogHistogram":
+        return cls({int(k): v for k, v in data.items()}, relative_accuracy)
@@ -0,0 +1,86 @@
+import time
+
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+_KT = TypeVar("_KT", bound=Hashable)
+_VT = TypeVar("_VT")
+
+
+class LocalCache(Generic[_KT, _VT]):
+    """
+    Process-local LRU cache with an optional TTL
+
+    Not shared between workers, callers must put a version into the key or
+    clear the cache when the source data changes
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: OrderedDict[_KT, tuple[float | None, _VT]] = OrderedDict()
+        # Bumped on every invalidation, see `set`
+        self.version: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: _KT) -> _VT | None:
+        """
+        Get value and mark it as recently used
+
+        :param key:
+        :return:
+        """
+        try:
+            expire_time, value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        if expire_time is not None and expire_time <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: _KT, value: _VT, version: int | None = None) -> None:
+        """
+        Set value, the least recently used entry is evicted when full
+
+        :param key:
+        :param value:
+        :param version: `version` read before loading the value, the value is
+            dropped if the cache was invalidated meanwhile
+        :return:
+        """
+        if version is not None and version != self.version:
+            return
+        expire_time = time.monotonic() + self._ttl if self._ttl else None
+        self._data[key] = (expire_time, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: _KT) -> _VT | None:
+        """
+        Remove value
+
+        :param key:
+        :return:
+        """
+        self.version += 1
+        item = self._data.pop(key, None)
+        return item[1] if item is not None else None
+
+    def clear(self) -> None:
+        """
+        Remove all values
+
+        :return:
+        """
+        self.version += 1
+        self._data.clear()
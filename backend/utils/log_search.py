@@ -0,0 +1,64 @@
+from typing import Any
+
+from sqlalchemy import Index
+
+from backend.common.enums import MatchType
+from backend.core.conf import settings
+from backend.utils.sql import escape_like
+
+# Default ngram_token_size of MySQL, shorter terms are never found by MATCH
+NGRAM_TOKEN_SIZE = 2
+
+
+def fulltext_enabled() -> bool:
+    """
+    Whether log tables have n-gram FULLTEXT indexes
+
+    :return:
+    """
+    return settings.LOG_FULLTEXT_ENABLED and not settings.LOG_PARTITION_ENABLED
+
+
+def fulltext_indexes(table: str, *columns: str) -> list[Index]:
+    """
+    n-gram FULLTEXT index of each column, used by contains search
+
+    :param table:
+    :param columns:
+    :return:
+    """
+    if not fulltext_enabled():
+        return []
+    return [
+        Index(
+            f"ft_{table}_{column}",
+            column,
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram",
+        )
+        for column in columns
+    ]
+
+
+def match_filter(column: str, value: str, match_type: MatchType) -> dict[str, Any]:
+    """
+    Filter of a text column for sqlalchemy-crud-plus
+
+    exact and prefix use the column index, contains uses the FULLTEXT index when it
+    exists and falls back to a LIKE scan otherwise
+
+    :param column:
+    :param value:
+    :param match_type:
+    :return:
+    """
+    if match_type == MatchType.exact:
+        return {column: value}
+    if match_type == MatchType.prefix:
+        # A constant pattern without leading wildcard is an index range scan
+        return {f"{column}__like": f"{escape_like(value)}%"}
+    if fulltext_enabled() and len(value) >= NGRAM_TOKEN_SIZE:
+        # Phrase search in boolean mode, the n-grams of the value must be adjacent
+        phrase = value.replace('"', " ")
+        return {f"{column}__match": f'"{phrase}"'}
+    return {f"{column}__like": f"%{escape_like(value)}%"}
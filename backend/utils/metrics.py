@@ -0,0 +1,77 @@
+from collections import defaultdict
+from typing import Any, Callable
+
+
+class Metrics:
+    """
+    Process-local metrics registry
+
+    Every gunicorn worker keeps its own registry, values are not aggregated across workers
+    """
+
+    def __init__(self):
+        self._counters: dict[str, int] = defaultdict(int)
+        self._timers: dict[str, dict[str, float]] = {}
+        self._gauges: dict[str, Callable[[], Any]] = {}
+
+    def incr(self, name: str, value: int = 1) -> None:
+        """
+        Increase counter
+
+        :param name:
+        :param value:
+        :return:
+        """
+        self._counters[name] += value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Record a duration sample
+
+        :param name:
+        :param seconds:
+        :return:
+        """
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+            self._timers[name] = timer
+        timer["count"] += 1
+        timer["total"] += seconds
+        timer["last"] = seconds
+        if seconds > timer["max"]:
+            timer["max"] = seconds
+
+    def register_gauge(self, name: str, func: Callable[[], Any]) -> None:
+        """
+        Register a gauge, the value is evaluated when taking a snapshot
+
+        :param name:
+        :param func:
+        :return:
+        """
+        self._gauges[name] = func
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Get current metrics
+
+        :return:
+        """
+        timers = {}
+        for name, timer in self._timers.items():
+            count = timer["count"]
+            timers[name] = {
+                "count": count,
+                "avg_ms": round(timer["total"] / count * 1000.0, 3) if count else 0.0,
+                "max_ms": round(timer["max"] * 1000.0, 3),
+                "last_ms": round(timer["last"] * 1000.0, 3),
+            }
+        return {
+            "counters": dict(self._counters),
+            "timers": timers,
+            "gauges": {name: func() for name, func in self._gauges.items()},
+        }
+
+
+metrics = Metrics()
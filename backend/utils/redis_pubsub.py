@@ -0,0 +1,105 @@
+import asyncio
+
+from typing import Awaitable, Callable
+
+from redis.asyncio.client import PubSub
+
+from backend.common.log import log
+from backend.database.db_redis import redis_client
+
+# message is None when the subscription was (re)established and messages may have been missed
+PubSubHandler = Callable[[str | None], Awaitable[None] | None]
+
+
+class RedisPubSub:
+    """
+    Process-wide redis pub/sub listener
+
+    Handlers must be registered before `start`, usually at module import time
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, list[PubSubHandler]] = {}
+        self._task: asyncio.Task | None = None
+        self._poll_seconds: float = 1.0
+        self._reconnect_seconds: float = 1.0
+
+    def subscribe(self, channel: str, handler: PubSubHandler) -> None:
+        """
+        Register channel handler
+
+        :param channel:
+        :param handler:
+        :return:
+        """
+        self._handlers.setdefault(channel, []).append(handler)
+
+    @staticmethod
+    async def publish(channel: str, message: str) -> int:
+        """
+        Publish message to channel
+
+        :param channel:
+        :param message:
+        :return:
+        """
+        return await redis_client.publish(channel, message)
+
+    async def start(self) -> None:
+        """
+        Start listener task
+
+        :return:
+        """
+        if self._task is None and self._handlers:
+            self._task = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        """
+        Stop listener task
+
+        :return:
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _dispatch(self, channel: str, message: str | None) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                result = handler(message)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                log.error(f"Redis pub/sub handler error on {channel}: {e}")
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub: PubSub = redis_client.pubsub()
+            try:
+                await pubsub.subscribe(*self._handlers.keys())
+                # Anything published while disconnected is lost, let handlers resync
+                for channel in self._handlers:
+                    await self._dispatch(channel, None)
+                while True:
+                    # Poll below the socket timeout so an idle channel is not a failure
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=self._poll_seconds
+                    )
+                    if message is None or message["type"] != "message":
+                        continue
+                    await self._dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Redis pub/sub listener error: {e}")
+                await asyncio.sleep(self._reconnect_seconds)
+            finally:
+                await pubsub.aclose()
+
+
+redis_pubsub = RedisPubSub()
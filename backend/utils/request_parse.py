@@ -1,6 +1,11 @@
+import mmap
+import sys
+
+from functools import lru_cache
+from typing import Any
+
 import httpx
 
-from asgiref.sync import sync_to_async
 from fastapi import Request
 from user_agents import parse
 from XdbSearchIP.xdbSearcher import XdbSearcher
@@ -10,6 +15,7 @@ from backend.common.log import log
 from backend.core.conf import settings
 from backend.core.path_conf import IP2REGION_XDB
 from backend.database.db_redis import redis_client
+from backend.utils.metrics import metrics
 
 
 def get_request_ip(request: Request) -> str:
@@ -49,19 +55,51 @@ async def get_location_online(ip: str, user_agent: str) -> dict | None:
             return None
 
 
-@sync_to_async
+_xdb_searcher: XdbSearcher | None = None
+
+
+def load_ip2region_xdb() -> XdbSearcher:
+    """
+    加载离线 ip 地址库，每个进程只加载一次
+
+    The file is mmap'd read only, so gunicorn workers share its page cache
+
+    :return:
+    """
+    global _xdb_searcher
+    if _xdb_searcher is None:
+        with open(IP2REGION_XDB, "rb") as f:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _xdb_searcher = XdbSearcher(contentBuff=content)
+    return _xdb_searcher
+
+
+def open_ip2region_xdb() -> None:
+    """
+    Load the offline ip database on startup, exit if it is not usable
+
+    :return:
+    """
+    try:
+        load_ip2region_xdb()
+    except Exception as e:
+        log.error("❌ ip2region xdb {} load failed {}", IP2REGION_XDB, e)
+        sys.exit()
+
+
+@lru_cache(maxsize=settings.IP_LOCATION_OFFLINE_CACHE_SIZE)
 def get_location_offline(ip: str) -> dict | None:
     """
     离线获取 ip 地址属地，无法保证准确率，100%可用
 
+    In memory binary search, results are kept in a per-process LRU, the
+    returned dict is shared and must not be modified
+
     :param ip:
     :return:
     """
     try:
-        cb = XdbSearcher.loadContentFromFile(dbfile=IP2REGION_XDB)
-        searcher = XdbSearcher(contentBuff=cb)
-        data = searcher.search(ip)
-        searcher.close()
+        data = load_ip2region_xdb().search(ip)
         data = data.split("|")
         return {
             "country": data[0] if data[0] != "0" else None,
@@ -76,14 +114,20 @@ def get_location_offline(ip: str) -> dict | None:
 async def parse_ip_info(request: Request) -> IpInfo:
     country, region, city = None, None, None
     ip = get_request_ip(request)
+    if settings.IP_LOCATION_PARSE == "offline":
+        # Cheaper than a redis round trip
+        location_info = get_location_offline(ip)
+        if location_info:
+            country = location_info.get("country")
+            region = location_info.get("regionName")
+            city = location_info.get("city")
+        return IpInfo(ip=ip, country=country, region=region, city=city)
     location = await redis_client.get(f"{settings.IP_LOCATION_REDIS_PREFIX}:{ip}")
     if location:
         country, region, city = location.split(" ")
         return IpInfo(ip=ip, country=country, region=region, city=city)
     if settings.IP_LOCATION_PARSE == "online":
         location_info = await get_location_online(ip, request.headers.get("User-Agent"))
-    elif settings.IP_LOCATION_PARSE == "offline":
-        location_info = await get_location_offline(ip)
     else:
         location_info = None
     if location_info:
@@ -99,9 +143,74 @@ async def parse_ip_info(request: Request) -> IpInfo:
 
 
 def parse_user_agent_info(request: Request) -> UserAgentInfo:
-    user_agent = request.headers.get("User-Agent")
+    return parse_user_agent(request.headers.get("User-Agent"))
+
+
+@lru_cache(maxsize=settings.USER_AGENT_PARSE_CACHE_SIZE)
+def parse_user_agent(user_agent: str | None) -> UserAgentInfo:
+    """
+    解析 user agent，结果缓存在进程内 LRU 中，返回的对象是共享的，不能修改
+
+    :param user_agent:
+    :return:
+    """
     _user_agent = parse(user_agent)
     os = _user_agent.get_os()
     browser = _user_agent.get_browser()
     device = _user_agent.get_device()
     return UserAgentInfo(user_agent=user_agent, device=device, os=os, browser=browser)
+
+
+def _cache_hit_ratio(func) -> float:
+    info = func.cache_info()
+    return round(info.hits / max(info.hits + info.misses, 1), 4)
+
+
+metrics.register_gauge(
+    "user_agent_parse_cache_hit_ratio", lambda: _cache_hit_ratio(parse_user_agent)
+)
+metrics.register_gauge(
+    "user_agent_parse_cache_size", lambda: parse_user_agent.cache_info().currsize
+)
+
+
+class LazyRequestState(dict):
+    """
+    请求状态，ip 属地和 user agent 解析结果在首次访问时才计算
+
+    Used as `scope["state"]`, so `request.state.os` etc. resolve through
+    `__missing__`. Online ip location needs io, it reads None until
+    `enrich_request_state` has been awaited
+    """
+
+    def __missing__(self, key: str) -> Any:
+        if key in ("os", "browser", "device"):
+            ua_info = parse_user_agent(self.get("user_agent"))
+            self.update(os=ua_info.os, browser=ua_info.browser, device=ua_info.device)
+        elif key in ("country", "region", "city"):
+            if settings.IP_LOCATION_PARSE != "offline":
+                return None
+            location_info = get_location_offline(self["ip"]) or {}
+            self.update(
+                country=location_info.get("country"),
+                region=location_info.get("regionName"),
+                city=location_info.get("city"),
+            )
+        else:
+            raise KeyError(key)
+        return self[key]
+
+
+async def enrich_request_state(request: Request) -> None:
+    """
+    Resolve every lazy request state field, call it once the response has
+    been sent so the work stays off the request latency
+
+    :param request:
+    :return:
+    """
+    state = request.scope.get("state")
+    if not isinstance(state, LazyRequestState) or "country" in state:
+        return
+    ip_info = await parse_ip_info(request)
+    state.update(country=ip_info.country, region=ip_info.region, city=ip_info.city)
@@ -0,0 +1,8 @@
+def escape_like(value: str) -> str:
+    """
+    Escape LIKE wildcards with the default MySQL escape character
+
+    :param value:
+    :return:
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
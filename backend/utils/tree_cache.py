@@ -0,0 +1,112 @@
+import hashlib
+
+from typing import Any, Awaitable, Callable, Hashable
+
+from fastapi import Request, Response
+from msgspec import json
+
+from backend.common.dataclasses import SerializedData
+from backend.common.response.response_code import CustomResponseCode
+from backend.core.conf import settings
+from backend.database.db_redis import redis_client
+from backend.utils.local_cache import LocalCache
+from backend.utils.metrics import metrics
+from backend.utils.redis_pubsub import redis_pubsub
+
+
+class TreeCache:
+    """
+    Process cache of serialized menu and dept trees
+
+    Entries are keyed by the global tree version and the filter set or role
+    set, a menu, dept or role change bumps the version in every worker
+    """
+
+    def __init__(self):
+        self._version: int = 0
+        self._cache: LocalCache[tuple[int, Hashable], SerializedData] = LocalCache(
+            settings.TREE_LOCAL_CACHE_SIZE
+        )
+        redis_pubsub.subscribe(settings.TREE_CHANNEL, self._on_change)
+        metrics.register_gauge("tree_local_cache_size", lambda: len(self._cache))
+        metrics.register_gauge(
+            "tree_local_cache_hit_ratio",
+            lambda: round(
+                self._cache.hits / max(self._cache.hits + self._cache.misses, 1), 4
+            ),
+        )
+
+    async def get(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> SerializedData:
+        """
+        获取序列化后的树形结构数据，未命中时通过 loader 加载
+
+        :param key: filter set or role set of the tree
+        :param loader:
+        :return:
+        """
+        version = self._version
+        data = self._cache.get((version, key))
+        if data is not None:
+            return data
+        tree = await loader()
+        content = json.encode(
+            {
+                "code": CustomResponseCode.HTTP_200.code,
+                "message": CustomResponseCode.HTTP_200.message,
+                "data": tree,
+            }
+        )
+        etag = f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+        data = SerializedData(content=content, etag=etag)
+        # A change published while loading bumped the version, the entry of
+        # the old version is never read
+        self._cache.set((version, key), data)
+        return data
+
+    async def _on_change(self, version: str | None) -> None:
+        """
+        Tree change subscriber
+
+        :param version: None after (re)subscribing, the latest version is read from redis
+        :return:
+        """
+        if version is None:
+            version = await redis_client.get(settings.TREE_VERSION_REDIS_KEY)
+        version = int(version or 0)
+        if version != self._version:
+            self._version = version
+            self._cache.clear()
+
+    async def notify_change(self) -> None:
+        """
+        Bump the tree version in every worker
+
+        :return:
+        """
+        version = await redis_client.incr(settings.TREE_VERSION_REDIS_KEY)
+        await self._on_change(str(version))
+        await redis_pubsub.publish(settings.TREE_CHANNEL, str(version))
+
+
+def serialized_response(request: Request, data: SerializedData) -> Response:
+    """
+    返回序列化数据，客户端携带的 If-None-Match 与 ETag 一致时返回 304
+
+    :param request:
+    :param data:
+    :return:
+    """
+    headers = {"ETag": data.etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etags = {etag.strip().removeprefix("W/") for etag in if_none_match.split(",")}
+        if data.etag in etags or "*" in etags:
+            return Response(status_code=304, headers=headers)
+    return Response(
+        content=data.content, media_type="application/json", headers=headers
+    )
+
+
+tree_cache = TreeCache()